@@ -1,7 +1,14 @@
 import streamlit as st
-import os
+import json
+import time
 import pandas as pd
-from run_all import run_evaluation
+import semantic
+from jobs import DONE, FAILED, JobRunner
+from metrics import slowest_documents
+from plagiarism_report import matched_with
+from rescore import DEFAULT_THRESHOLDS, score_features
+from result_cache import EvaluationCache, ResultCache, evaluation_key, evaluation_version
+from uploads import hash_uploads
 
 st.set_page_config(page_title="GC – AI Lab Evaluator", layout="wide")
 
@@ -50,13 +57,124 @@ html, body, [class*="css"] {
 st.sidebar.markdown("## GC – AI Evaluator")
 page = st.sidebar.radio("Modules", ["Evaluate", "Reports"])
 
+# Thresholds only re-score stored features: no PDF is read again
+with st.sidebar.expander("What-if thresholds"):
+    d = DEFAULT_THRESHOLDS
+    flag_medium, flag_high = st.slider(
+        "Plagiarism MEDIUM / HIGH above", 0.0, 1.0, (d["flag_medium"], d["flag_high"]), 0.01
+    )
+    report_threshold = st.slider("Report pairs from", 0.0, 1.0, d["report"], 0.01)
+    theory_band = st.slider("Theory words for full points", 0, 1000, d["theory_band"], 10)
+    caps = [
+        (above, st.number_input(f"Marks cap when AI-likelihood > {above}", 0, 100, cap))
+        for above, cap in d["caps"]
+    ]
+    bands = [
+        (st.number_input(f"Band {band}/5 from", 0, 100, at_least), band)
+        for at_least, band in d["bands"]
+    ]
+    pairwise_mode = st.radio(
+        "Pairwise report", ["top_k", "threshold", "full"],
+        format_func={"top_k": "Top-k neighbours", "threshold": "Above report threshold",
+                     "full": "Every pair"}.get
+    )
+    top_k = st.number_input("Neighbours per student", 1, 50, d["top_k"])
+
+thresholds = {
+    "flag_high": flag_high,
+    "flag_medium": flag_medium,
+    "report": report_threshold,
+    "theory_band": tuple(theory_band),
+    "caps": caps,
+    "bands": sorted(bands, reverse=True),
+    "pairwise": pairwise_mode,
+    "top_k": top_k,
+}
+
 st.markdown('<div class="erp-header">AI Lab Evaluation System</div>', unsafe_allow_html=True)
 
 # ---------------- Session Storage ----------------
-if "results" not in st.session_state:
-    st.session_state["results"] = None
+if "features" not in st.session_state:
+    st.session_state["features"] = None
+    st.session_state["features_token"] = 0
+if "job_id" not in st.session_state:
+    # The job id lives in the URL too, so a browser refresh reattaches
+    st.session_state["job_id"] = st.query_params.get("job")
+
+# ---------------- Result Caching / Jobs ----------------
+@st.cache_resource
+def evaluation_store():
+    return EvaluationCache()
+
+@st.cache_resource
+def job_runner():
+    # One worker pool per server, shared by every session
+    return JobRunner(evaluation_cache=evaluation_store(), result_cache=ResultCache())
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_evaluation(key):
+    # key covers (file names + hashes, topic, config version)
+    result = evaluation_store().get(key)
+    if result is None:
+        raise LookupError(key)    # misses are not memoized
+    return result
+
+def show_features(features):
+    st.session_state["features"] = features
+    st.session_state["features_token"] += 1
+
+def current_results():
+    """Stored features scored with the sidebar thresholds (memoized)."""
+    features = st.session_state["features"]
+    if features is None:
+        return None
+    key = (st.session_state["features_token"], json.dumps(thresholds, sort_keys=True))
+    if st.session_state.get("scored_key") != key:
+        st.session_state["scored"] = score_features(features, thresholds)
+        st.session_state["scored_key"] = key
+    return st.session_state["scored"]
+
+PAGE_SIZE = 200
+
+def show_paged(df, key):
+    # Only the selected page is sent to the browser, never the whole report
+    pages = max(1, -(-len(df) // PAGE_SIZE))
+    number = st.number_input(f"Page (of {pages})", 1, pages, 1, key=key) if pages > 1 else 1
+    start = (number - 1) * PAGE_SIZE
+    st.caption(f"Rows {min(start + 1, len(df))}–{min(start + PAGE_SIZE, len(df))} of {len(df)}")
+    st.dataframe(df.iloc[start:start + PAGE_SIZE], use_container_width=True)
+
+def watch_job(job_id):
+    st.session_state["job_id"] = job_id
+    if job_id:
+        st.query_params["job"] = job_id
+    elif "job" in st.query_params:
+        del st.query_params["job"]
 
 # ---------------- Helpers ----------------
+def show_slowest(run_metrics, n=10):
+    # Costs of the run that produced the shown results (maybe an earlier, cached one)
+    totals = run_metrics["totals"]
+    with st.expander("Slowest documents"):
+        st.caption(
+            f"{totals['documents']} files: {totals['cache_hits']} from cache, "
+            f"{totals['failed']} unreadable, {totals['pages']} pages and "
+            f"{totals['images']} images parsed"
+        )
+        slow = slowest_documents(run_metrics["documents"], n)
+        if not slow:
+            st.write("Every file came from the cache.")
+            return
+        st.dataframe(pd.DataFrame([{
+            "File": d["file"],
+            "Seconds": round(d["seconds"], 2),
+            "CPU Seconds": round(d["cpu_seconds"], 2),
+            "Pages": d["pages"],
+            "Images": d["images"],
+            "Size (MB)": round(d["bytes"] / 1e6, 2),
+            "Peak Memory (MB)": round(d["peak_bytes"] / 1e6, 1) if d["peak_bytes"] else None,
+        } for d in slow]), hide_index=True, use_container_width=True)
+
 def integrity_badge(row):
     if row["Plagiarism"] == "HIGH":
         return "🔴 High Risk"
@@ -82,40 +200,94 @@ if page == "Evaluate":
         st.markdown('<div class="erp-panel">', unsafe_allow_html=True)
         st.markdown('<div class="erp-title">Experiment Setup</div>', unsafe_allow_html=True)
         topic = st.text_area("Experiment Topic / Aim", height=80)
-        uploaded = st.file_uploader("Student PDF Submissions", type=["pdf"], accept_multiple_files=True)
+        uploaded = st.file_uploader(
+            "Student PDF Submissions (PDFs or one ZIP export)", type=["pdf", "zip"],
+            accept_multiple_files=True
+        )
+        archives = [f for f in uploaded or [] if f.name.lower().endswith(".zip")]
         st.markdown('</div>', unsafe_allow_html=True)
 
+        # Start loading the embedding model once files arrive,
+        # so it is ready (or close) by the time Evaluate is clicked
+        if uploaded and not semantic.is_loaded():
+            semantic.warm_up()
+
         if st.button("Evaluate Submissions"):
             if not uploaded or not topic.strip():
                 st.error("Please upload PDFs and enter topic.")
+            elif archives and len(uploaded) > 1:
+                st.error("Upload either PDFs or a single ZIP archive.")
             else:
-                os.makedirs("submissions", exist_ok=True)
-                for f in os.listdir("submissions"):
-                    os.remove(os.path.join("submissions", f))
+                batch = [(f.name, f.getvalue()) for f in uploaded]
+                _, files = hash_uploads(batch)
+                key = evaluation_key(files, topic, evaluation_version())
+
+                try:
+                    show_features(cached_evaluation(key))
+                    watch_job(None)
+                except LookupError:
+                    # Same files and topic already on their way: follow that job
+                    runner = job_runner()
+                    watch_job(runner.store.find_unfinished(key)
+                              or runner.submit(batch, topic, cache_key=key))
 
-                for f in uploaded:
-                    with open(os.path.join("submissions", f.name), "wb") as out:
-                        out.write(f.read())
+        # -------- Job Progress --------
+        polling = False
+        job_id = st.session_state["job_id"]
+        job = job_runner().store.get(job_id) if job_id else None
 
-                with st.spinner("Running evaluation engine..."):
-                    st.session_state["results"] = run_evaluation("submissions", topic)
+        if job_id and job is None:
+            watch_job(None)
+        elif job and job["status"] == DONE:
+            show_features(job_runner().store.result(job_id))
+            watch_job(None)
+        elif job and job["status"] == FAILED:
+            lines = (job["error"] or "").strip().splitlines() or ["unknown error"]
+            st.error("Evaluation failed:\n\n" + lines[-1])
+            watch_job(None)
+        elif job:
+            polling = True
+            total = max(job["files_total"], 1)
+            label = f"Job {job_id[:8]}: {job['files_done']}/{job['files_total']} files"
+            if job["current"]:
+                label += f" – {job['current']}"
+            st.progress(min(job["files_done"] / total, 1.0), text=label)
+            if job["stages"]:
+                st.dataframe(
+                    pd.DataFrame(list(job["stages"].items()), columns=["Stage", "Seconds"]),
+                    hide_index=True, use_container_width=True
+                )
+
+        # -------- Stored Jobs (any session) --------
+        with st.expander("Recent evaluation jobs"):
+            recent = job_runner().store.recent()
+            if recent:
+                st.dataframe(pd.DataFrame([{
+                    "Job": j["id"][:8],
+                    "Status": j["status"],
+                    "Files": f"{j['files_done']}/{j['files_total']}",
+                    "Topic": j["topic"][:40],
+                    "Created": time.strftime("%Y-%m-%d %H:%M", time.localtime(j["created"]))
+                } for j in recent]), hide_index=True, use_container_width=True)
+
+            finished = [j["id"] for j in recent if j["status"] == DONE]
+            pick = st.selectbox("Load results of job", [""] + finished,
+                                format_func=lambda j: j[:8] if j else "–")
+            if pick and st.button("Load Job Results"):
+                show_features(job_runner().store.result(pick))
 
     with right:
-        if st.session_state["results"]:
-            df, pairwise, who, graph_html = st.session_state["results"]
+        results = current_results()
+        if results:
+            df, pairwise, who, graph_html = results
+            df = df.copy()
 
             # -------- Status Badges --------
             df["Integrity_Status"] = df.apply(integrity_badge, axis=1)
             df["AI_Status"] = df["AI_Likelihood"].apply(ai_badge)
 
             # -------- Similarity Mapping --------
-            df["Matched_With"] = ""
-            if who is not None and not who.empty:
-                for _, r in who.iterrows():
-                    a, b = r["Student_1"], r["Student_2"]
-                    label = f"{r['Risk_Level']} ({r['Similarity']}%)"
-                    df.loc[df["File"] == a, "Matched_With"] = label
-                    df.loc[df["File"] == b, "Matched_With"] = label
+            df["Matched_With"] = matched_with(df["File"], who)
 
             # -------- Summary Table --------
             st.markdown('<div class="erp-panel">', unsafe_allow_html=True)
@@ -170,9 +342,19 @@ if page == "Evaluate":
 
             st.markdown('</div>', unsafe_allow_html=True)
 
+            # -------- Slowest Documents --------
+            run_metrics = st.session_state["features"].metrics
+            if run_metrics and run_metrics["documents"]:
+                show_slowest(run_metrics)
+
+    # Poll the running job once the page is drawn
+    if polling:
+        time.sleep(1)
+        st.rerun()
+
 # ---------------- Reports Page ----------------
-if page == "Reports" and st.session_state["results"]:
-    _, pairwise, who, graph_html = st.session_state["results"]
+if page == "Reports" and st.session_state["features"] is not None:
+    _, pairwise, who, graph_html = current_results()
 
     if graph_html:
         st.markdown('<div class="erp-panel">', unsafe_allow_html=True)
@@ -181,7 +363,7 @@ if page == "Reports" and st.session_state["results"]:
         st.markdown('</div>', unsafe_allow_html=True)
 
     if who is not None:
-        st.dataframe(who, use_container_width=True)
+        show_paged(who, "who_page")
 
     if pairwise is not None:
-        st.dataframe(pairwise, use_container_width=True)
+        show_paged(pairwise, "pairwise_page")
@@ -0,0 +1,380 @@
+"""
+Headless batch evaluation, e.g. for nightly cron runs.
+
+    python batch.py submissions --topic "Linear regression"
+    python batch.py 2024/A 2024/B --topic "Linear regression" --workers 0
+    python batch.py 2024 --each --topic "Linear regression" \
+        --state-dir cache/states --archive cache/fingerprints.sqlite
+    python batch.py submissions --topic "Linear regression" --metrics --profile
+    python batch.py lms-export.zip --topic "Linear regression"
+
+Every folder, or ZIP/tar archive (evaluated without unpacking it),
+is one cohort. Its reports (final_marks, pairwise, who
+as CSV/Parquet, plagiarism_network.html, features.pkl for re-scoring)
+are written to OUT/<folder>/ as soon as it finishes, or to OUT itself
+for a single folder. With several folders, OUT/final_marks.csv and
+.parquet (read by gui.py) collect every folder's rows: they are
+streamed to .partial files while the run goes on and replace the
+previous files only when it ends, so readers never see a half run.
+
+--metrics adds metrics.json and metrics.prom (Prometheus text format,
+labelled with the folder) per folder: time, CPU, memory per stage and
+per PDF, pages, images, bytes, cache hits. --profile adds
+profiles/<stage>.prof (cProfile; PDF extraction only with --workers 1).
+
+Exit status: 0 ok, 1 a folder failed (the others are still written),
+3 another run on the same OUT is still going.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from fingerprint_store import PHASH_CHUNKS
+from marks import MARK_COLUMNS
+from plagiarism_report import PAIRWISE_MODES
+from result_cache import DEFAULT_CACHE_PATH
+from semantic import SECTION_COLUMNS
+from sources import ARCHIVE_SUFFIXES, is_archive
+
+log = logging.getLogger("batch")
+
+FORMATS = ("csv", "parquet")
+LOCK_NAME = ".batch.lock"
+
+# Columns of the combined final_marks table with their Arrow types, so
+# that a column that is empty in one folder does not fix its type
+FINAL_MARKS_COLUMNS = [
+    ("Folder", "string"), ("File", "string"), ("Filename_OK", "bool"),
+    ("Missing_Sections", "string"), ("Theory_Words", "int64"), ("Screenshots", "bool"),
+    ("Implementation_Present", "bool"), ("Analysis_Present", "bool"),
+    ("Conclusion_Present", "bool"), ("Plagiarism", "string"),
+    ("Screenshot_Status", "string"), ("Screenshot_Plagiarism", "string"),
+    *((col, "float64") for col in SECTION_COLUMNS),
+    ("Integrity_Remark", "string"),
+    *((col, "float64") for col in MARK_COLUMNS),
+]
+
+
+# ============================================================
+#  OUTPUT FILES
+# ============================================================
+
+def _atomic(path, write):
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def write_table(df, stem, formats):
+    """
+    df as stem.csv / stem.parquet, each replaced atomically. None
+    removes earlier files, so no stale report outlives its run.
+    """
+    if df is None:
+        for fmt in FORMATS:
+            if os.path.exists(f"{stem}.{fmt}"):
+                os.remove(f"{stem}.{fmt}")
+        return
+    if "csv" in formats:
+        _atomic(stem + ".csv", lambda p: df.to_csv(p, index=False))
+    if "parquet" in formats:
+        _atomic(stem + ".parquet", lambda p: df.to_parquet(p, index=False))
+
+
+class TableStream:
+    """
+    Appends DataFrames to stem.csv / stem.parquet (one Parquet row
+    group each). Rows go to .partial files; commit() moves them in
+    place, abort() drops them.
+
+    columns: [(name, Arrow type alias)] every DataFrame is conformed
+    to (missing columns are null, others dropped); None takes the
+    first DataFrame's columns and inferred types. A DataFrame that
+    does not convert raises before anything is written.
+    """
+
+    def __init__(self, stem, formats, columns=None):
+        self.stem = stem
+        self.formats = formats
+        self.columns = None if columns is None else [name for name, _ in columns]
+        self.types = columns
+        self.rows = 0
+        self._schema = None
+        self._parquet = None
+
+    def append(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+
+        table = None
+        if "parquet" in self.formats:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._schema is None and self.types is not None:
+                self._schema = pa.schema([(name, pa.type_for_alias(t)) for name, t in self.types])
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._schema is None:
+                self._schema = table.schema
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.stem + ".parquet.partial", self._schema)
+
+        if "csv" in self.formats:
+            df.to_csv(self.stem + ".csv.partial", mode="a" if self.rows else "w",
+                      header=not self.rows, index=False)
+        if table is not None:
+            self._parquet.write_table(table)
+        self.rows += len(df)
+
+    def _close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def commit(self):
+        self._close()
+        if self.rows:
+            for fmt in self.formats:
+                os.replace(f"{self.stem}.{fmt}.partial", f"{self.stem}.{fmt}")
+
+    def abort(self):
+        self._close()
+        for fmt in self.formats:
+            if os.path.exists(f"{self.stem}.{fmt}.partial"):
+                os.remove(f"{self.stem}.{fmt}.partial")
+
+
+def write_reports(results, features, out_dir, formats):
+    df, pairwise, who, graph_html = results
+    os.makedirs(out_dir, exist_ok=True)
+
+    features.save(os.path.join(out_dir, "features.pkl"))
+    write_table(df, os.path.join(out_dir, "final_marks"), formats)
+    write_table(pairwise, os.path.join(out_dir, "pairwise"), formats)
+    write_table(who, os.path.join(out_dir, "who"), formats)
+
+    graph_path = os.path.join(out_dir, "plagiarism_network.html")
+    if graph_html:
+        def write_graph(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(graph_html)
+        _atomic(graph_path, write_graph)
+    elif os.path.exists(graph_path):
+        os.remove(graph_path)    # no suspicious pairs any more
+
+
+# ============================================================
+#  RUN
+# ============================================================
+
+def cohort_name(path):
+    base = os.path.basename(os.path.normpath(path)) or "submissions"
+    for suffix in ARCHIVE_SUFFIXES:
+        if base.lower().endswith(suffix) and len(base) > len(suffix):
+            return base[:-len(suffix)]
+    return base
+
+
+def find_folders(paths, each=False):
+    """
+    [(name, folder)]: the given folders or archives, or with each=True
+    the subfolders and archives inside them.
+    """
+    folders = []
+    for path in paths:
+        if each and os.path.isdir(path):
+            folders.extend(
+                os.path.join(path, sub) for sub in sorted(os.listdir(path))
+                if os.path.isdir(os.path.join(path, sub)) or is_archive(os.path.join(path, sub))
+            )
+        else:
+            folders.append(path)
+
+    named = []
+    taken = set()
+    for folder in folders:
+        base = cohort_name(folder)
+        name, k = base, 1
+        while name in taken:
+            k += 1
+            name = f"{base}-{k}"
+        taken.add(name)
+        named.append((name, folder))
+    return named
+
+
+def file_logger(name, every):
+    """progress callback logging every n-th file and each stage."""
+    def progress(event, **info):
+        if event == "file":
+            if info["done"] == info["total"] or info["done"] % every == 0:
+                # total is unknown while a tar archive is streamed
+                total = "?" if info["total"] is None else info["total"]
+                log.info("%s: %d/%s files", name, info["done"], total)
+        elif event == "stage":
+            log.info("%s: %s %.2fs", name, info["name"], info["seconds"])
+    return progress
+
+
+def write_metrics(metrics, name, out_dir):
+    _atomic(os.path.join(out_dir, "metrics.json"), metrics.write_json)
+    _atomic(os.path.join(out_dir, "metrics.prom"),
+            lambda p: metrics.write_prometheus(p, {"folder": name}))
+
+
+def evaluate_folder(name, folder, args, cache, archive, metrics=None):
+    from incremental import EvaluationState
+    from rescore import score_features
+    from run_all import extract_features
+
+    state = None
+    if args.state_dir:
+        state_path = os.path.join(args.state_dir, name + ".pkl")
+        state = EvaluationState.load(state_path)
+
+    progress = None if args.quiet else file_logger(name, args.log_every)
+    features = extract_features(
+        folder, args.topic, workers=args.workers, cache=cache,
+        plagiarism_mode=args.mode, screenshot_distance=args.screenshot_distance,
+        archive=archive, archive_cohort=args.cohort or name, state=state,
+        progress=progress, metrics=metrics
+    )
+    if state is not None:
+        state.save(state_path)
+
+    results = score_features(features, {"pairwise": args.pairwise, "top_k": args.top_k},
+                             metrics=metrics)
+    return features, results
+
+
+def acquire_lock(out):
+    """Open lock file held for the process lifetime, or None if another run has it."""
+    handle = open(os.path.join(out, LOCK_NAME), "a")
+    try:
+        import fcntl
+    except ImportError:
+        return handle    # no advisory locks on this platform
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Evaluate folders of lab-report PDFs without the web app."
+    )
+    parser.add_argument("folders", nargs="+", help="submission folder(s) or ZIP/tar archive(s)")
+    parser.add_argument("--topic", required=True, help="experiment topic for relevance scoring")
+    parser.add_argument("--each", action="store_true",
+                        help="treat every subfolder or archive in the given folders as a cohort")
+    parser.add_argument("--out", default="reports", help="output folder (default: reports)")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=FORMATS,
+                        default=list(FORMATS), help="table formats (default: csv parquet)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="PDF worker processes; 0 = one per core (default), 1 = serial")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help=f"per-PDF result cache (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the result cache")
+    parser.add_argument("--state-dir",
+                        help="keep incremental state per folder here; re-runs only redo changed files")
+    parser.add_argument("--archive", help="fingerprint store of earlier cohorts to check against")
+    parser.add_argument("--cohort", help="archive cohort label (default: the folder name)")
+    parser.add_argument("--mode", choices=["exact", "lsh"], default="exact",
+                        help="plagiarism comparison: all pairs or LSH candidates")
+    parser.add_argument("--screenshot-distance", type=int, default=0,
+                        help="phash bits two screenshots may differ by (default: 0; "
+                             f"below {PHASH_CHUNKS} with --archive)")
+    parser.add_argument("--pairwise", choices=PAIRWISE_MODES, default="top_k",
+                        help="rows of the pairwise report (default: top_k)")
+    parser.add_argument("--top-k", type=int, default=5, help="neighbours per student in top_k mode")
+    parser.add_argument("--metrics", action="store_true",
+                        help="write metrics.json and metrics.prom per folder")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="measure peak memory per stage and PDF (slower)")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile every stage into profiles/<stage>.prof per folder")
+    parser.add_argument("--log-every", type=int, default=100, help="log every n-th file")
+    parser.add_argument("--quiet", action="store_true", help="log folder results and errors only")
+    args = parser.parse_args(argv)
+    if args.archive and args.screenshot_distance >= PHASH_CHUNKS:
+        parser.error(f"--screenshot-distance must be < {PHASH_CHUNKS} with --archive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, stream=sys.stderr,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+    os.makedirs(args.out, exist_ok=True)
+    lock = acquire_lock(args.out)
+    if lock is None:
+        log.error("another batch run is writing to %s", args.out)
+        return 3
+
+    from metrics import RunMetrics
+    from result_cache import ResultCache
+
+    cache = None if args.no_cache else ResultCache(args.cache)
+    archive = None
+    if args.archive:
+        from fingerprint_store import FingerprintStore
+        archive = FingerprintStore(args.archive)
+
+    missing = [path for path in args.folders if not (os.path.isdir(path) or is_archive(path))]
+    for path in missing:
+        log.error("%s: not a folder or archive", path)
+    folders = find_folders([p for p in args.folders if p not in missing], args.each)
+    combined = TableStream(os.path.join(args.out, "final_marks"), args.formats,
+                           FINAL_MARKS_COLUMNS) if len(folders) > 1 else None
+    failed = len(missing)
+    start = time.perf_counter()
+
+    try:
+        for name, folder in folders:
+            out_dir = os.path.join(args.out, name) if combined else args.out
+            t0 = time.perf_counter()
+            try:
+                with RunMetrics(args.trace_memory, args.profile) as metrics:
+                    features, results = evaluate_folder(name, folder, args, cache, archive, metrics)
+                write_reports(results, features, out_dir, args.formats)
+                if args.metrics:
+                    write_metrics(metrics, name, out_dir)
+                if args.profile:
+                    metrics.dump_profiles(os.path.join(out_dir, "profiles"))
+                df = results[0]
+                if combined is not None:
+                    combined.append(df.assign(Folder=name))
+            except Exception:
+                failed += 1
+                log.exception("%s: evaluation failed", name)
+                continue
+
+            log.info("%s: %d documents in %.1fs -> %s", name, len(df),
+                     time.perf_counter() - t0, out_dir)
+
+        if combined is not None:
+            combined.commit()
+    except BaseException:
+        if combined is not None:
+            combined.abort()
+        raise
+    finally:
+        lock.close()
+
+    if cache is not None:
+        log.info("result cache: %d hits, %d misses", cache.hits, cache.misses)
+    log.info("%d folder(s), %d failed, %.1fs", len(folders) + len(missing), failed,
+             time.perf_counter() - start)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Synthetic lab-report PDFs for benchmarking the whole pipeline.
+
+Each report has the SECTION_ALIASES headings (a random alias each,
+some sections dropped), a theory section of controllable length,
+padding pages and embedded JPEG screenshots. A share of the reports
+copy an earlier report's theory, verbatim or paraphrased, and usually
+its screenshots too.
+
+PDFs are written directly (Helvetica text, DCTDecode images), so no
+PDF library beyond the repo's own requirements is needed.
+
+Run from the repository root:
+    python -m benchmarks.corpus OUT_FOLDER --n 100
+"""
+import argparse
+import io
+import os
+import random
+import re
+import numpy as np
+from PIL import Image
+from evaluator import FIRST_THEORY_END, SECTION_ALIASES
+from benchmarks.lsh_recall import make_vocabulary, paraphrase, sentence
+
+LINES_PER_PAGE = 50
+WORDS_PER_LINE = 12
+
+# Words that read as headings, or that start/end the theory section
+# anywhere in a word (evaluator.THEORY_PATTERNS), stay out of the prose
+RESERVED = {alias for aliases in SECTION_ALIASES.values() for alias in aliases}
+THEORY_MARKERS = re.compile(r"theory|algorithm|methodology|procedure|steps|dataset|implementation|code")
+
+
+# ============================================================
+#  MINIMAL PDF WRITER
+# ============================================================
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """
+    pages: [(lines, images)]; lines are ASCII strings, images are
+    JPEG bytes with their (width, height), drawn below the text.
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(None)    # filled once the kids are known
+    kids = []
+
+    for lines, images in pages:
+        content = ["BT /F1 11 Tf 14 TL 50 790 Td"]
+        content += [f"({_escape(line)}) Tj T*" for line in lines]
+        content.append("ET")
+
+        xobjects = []
+        y = 790 - 14 * len(lines) - 20
+        for k, (data, (w, h)) in enumerate(images):
+            image = add(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+                b"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode "
+                b"/Length %d >>\nstream\n" % (w, h, len(data)) + data + b"\nendstream"
+            )
+            xobjects.append(f"/Im{k} {image} 0 R")
+            dw, dh = 240, 240 * h // w
+            y -= dh
+            content.append(f"q {dw} 0 0 {dh} 50 {y} cm /Im{k} Do Q")
+            y -= 10
+
+        stream = "\n".join(content).encode("latin-1")
+        contents = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add((
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] "
+            f"/Contents {contents} 0 R /Resources << /Font << /F1 {font} 0 R >> "
+            f"/XObject << {' '.join(xobjects)} >> >> >>"
+        ).encode("latin-1")))
+
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+    ).encode("latin-1")
+    catalog = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("latin-1"))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# ============================================================
+#  REPORT CONTENT
+# ============================================================
+
+def wrap(text):
+    words = text.split()
+    return [" ".join(words[k:k + WORDS_PER_LINE]) for k in range(0, len(words), WORDS_PER_LINE)]
+
+
+def prose(rng, vocab, words):
+    out = []
+    while sum(len(s.split()) for s in out) < words:
+        out.append(sentence(rng, vocab))
+    return " ".join(out)
+
+
+def screenshot(rng, size):
+    # Gradient + UI-like blocks + noise, like benchmarks.image_hashing
+    # but at any size
+    w, h = size
+    x = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None, None]
+    arr = np.broadcast_to((x + y) / 2, (h, w, 3)).copy()
+    bw, bh = max(w // 8, 1), max(h // 8, 1)
+    for _ in range(20):
+        x0, y0 = rng.integers(0, w - bw + 1), rng.integers(0, h - bh + 1)
+        arr[y0:y0 + bh, x0:x0 + bw] = rng.integers(0, 255, 3)
+    arr += rng.normal(0, 4, arr.shape)
+    return Image.fromarray(arr.clip(0, 255).astype(np.uint8))
+
+
+def jpeg(image):
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=80)
+    return buf.getvalue(), image.size
+
+
+def report_pages(sections, images, pages):
+    """Lines of every section, then screenshots two per page, padded to pages."""
+    lines = []
+    for heading, body in sections:
+        lines.append(heading)
+        lines.extend(wrap(body))
+
+    out = [(lines[k:k + LINES_PER_PAGE], []) for k in range(0, len(lines), LINES_PER_PAGE)]
+    out += [([f"Screenshot {k + 1}"], images[k:k + 2]) for k in range(0, len(images), 2)]
+    while len(out) < pages:
+        out.append((["Appendix"], []))
+    return out
+
+
+def make_corpus(folder, n, seed=0, pages=3, theory_words=(150, 400), screenshots=(0, 4),
+                copy_rate=0.15, paraphrase_rates=(0.0, 0.1, 0.25), drop_rate=0.1,
+                screenshot_size=(320, 200)):
+    """
+    Writes n reports to folder and returns their manifest, one dict
+    per file (name, source of copied text or None, paraphrase rate,
+    screenshot count, dropped sections).
+
+    pages: minimum page count (padded with appendix pages).
+    theory_words / screenshots: inclusive (low, high) ranges.
+    copy_rate: share of reports whose theory copies an earlier one,
+    paraphrased at a rate drawn from paraphrase_rates; copies reuse
+    the source's screenshots half of the time.
+    drop_rate: chance each optional section is left out.
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    vocab = [w for w in make_vocabulary(rng) if w not in RESERVED and not THEORY_MARKERS.search(w)]
+    os.makedirs(folder, exist_ok=True)
+
+    theories, shots, manifest = [], [], []
+    for i in range(n):
+        name = f"S{i:05d}_Exp1_AI_GC.pdf"
+        source, rate = None, None
+
+        if theories and rng.random() < copy_rate:
+            source = rng.randrange(len(theories))
+            rate = rng.choice(paraphrase_rates)
+            theory = paraphrase(rng, vocab, theories[source], rate)
+            if rng.random() < 0.5:
+                images = shots[source]
+            else:
+                images = [jpeg(screenshot(np_rng, screenshot_size))
+                          for _ in range(rng.randint(*screenshots))]
+        else:
+            theory = prose(rng, vocab, rng.randint(*theory_words))
+            images = [jpeg(screenshot(np_rng, screenshot_size))
+                      for _ in range(rng.randint(*screenshots))]
+        theories.append(theory)
+        shots.append(images)
+
+        sections, dropped = [], []
+        for section, aliases in SECTION_ALIASES.items():
+            if section not in ("Theory", "Algorithm / Methodology") and rng.random() < drop_rate:
+                dropped.append(section)
+                continue
+            if section == "Theory":
+                aliases = ["theory"]    # the only heading extract_theory reads
+            elif section == "Algorithm / Methodology":
+                # A heading extract_theory recognises as the end of the theory
+                aliases = [a for a in aliases if FIRST_THEORY_END.search(a)]
+            body = theory if section == "Theory" else prose(rng, vocab, rng.randint(15, 60))
+            sections.append((rng.choice(aliases).title(), body))
+
+        write_pdf(os.path.join(folder, name), report_pages(sections, images, pages))
+        manifest.append({
+            "name": name,
+            "source": manifest[source]["name"] if source is not None else None,
+            "paraphrase": rate,
+            "screenshots": len(images),
+            "dropped": dropped,
+        })
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic submission folder.")
+    parser.add_argument("folder")
+    parser.add_argument("--n", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--copy-rate", type=float, default=0.15)
+    args = parser.parse_args()
+
+    manifest = make_corpus(args.folder, args.n, args.seed, args.pages, copy_rate=args.copy_rate)
+    copies = sum(m["source"] is not None for m in manifest)
+    print(f"{len(manifest)} reports in {args.folder} ({copies} with copied theory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+plagiarism.hybrid_similarity: sparse shingle matrices vs the original
+pure-Python double loop.
+
+Run from the repository root:
+    python -m benchmarks.hybrid_similarity
+"""
+import random
+import time
+import numpy as np
+import plagiarism
+from plagiarism import char_ngrams, jaccard, long_sentences, normalize
+
+WORDS = (
+    "cluster centroid distance feature vector kmeans iteration converge "
+    "label sample variance mean point assign update random initial "
+    "elbow method inertia silhouette score group similar unsupervised "
+    "partition boundary euclidean space dimension scale normalise"
+).split()
+
+
+# ============================================================
+#  ORIGINAL IMPLEMENTATION (reference)
+# ============================================================
+
+def loop_hybrid_similarity(texts):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    cleaned = []
+    index = []
+
+    for i, t in enumerate(texts):
+        sents = long_sentences(t)
+        if len(sents) >= 2:
+            cleaned.append(" ".join(normalize(s) for s in sents))
+            index.append(i)
+
+    if len(cleaned) < 2:
+        return None, index
+
+    tfidf = TfidfVectorizer(min_df=2).fit_transform(cleaned)
+    tfidf_sim = cosine_similarity(tfidf)
+
+    ngram_sets = [char_ngrams(t) for t in cleaned]
+
+    phrase_sets = []
+    for t in cleaned:
+        w = t.split()
+        phrase_sets.append(set(tuple(w[i:i+3]) for i in range(len(w)-2)))
+
+    n = len(cleaned)
+    hybrid = [[0]*n for _ in range(n)]
+
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                hybrid[i][j] = 1.0
+            else:
+                s1 = tfidf_sim[i][j]
+                s2 = jaccard(ngram_sets[i], ngram_sets[j])
+                s3 = jaccard(phrase_sets[i], phrase_sets[j])
+                hybrid[i][j] = max(s1, s2, s3)
+
+    return hybrid, index
+
+
+# ============================================================
+#  SYNTHETIC CORPUS
+# ============================================================
+
+def sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))) + "."
+
+
+def make_corpus(rng, n, copy_rate=0.2):
+    texts = []
+    for _ in range(n):
+        sents = [sentence(rng) for _ in range(rng.randint(6, 14))]
+        if texts and rng.random() < copy_rate:
+            # Copy part of an earlier submission
+            donor = rng.choice(texts).split(". ")
+            sents[: len(donor) // 2] = donor[: len(donor) // 2]
+        texts.append(" ".join(sents))
+    return texts
+
+
+def main():
+    rng = random.Random(11)
+
+    print(f"{'n':>6} {'loop (s)':>10} {'sparse (s)':>11} {'speedup':>9} {'max |diff|':>11}")
+    for n in [50, 200, 500]:
+        texts = make_corpus(rng, n)
+
+        start = time.perf_counter()
+        old, old_index = loop_hybrid_similarity(texts)
+        t_old = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new, new_index = plagiarism.hybrid_similarity(texts)
+        t_new = time.perf_counter() - start
+
+        assert old_index == new_index
+        assert new.dtype == np.float32
+        diff = float(np.abs(np.asarray(old, dtype=np.float64) - new).max())
+        assert diff < 1e-5, diff
+
+        print(f"{n:>6} {t_old:>10.2f} {t_new:>11.3f} {t_old / t_new:>8.1f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
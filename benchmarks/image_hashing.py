@@ -0,0 +1,96 @@
+"""
+Screenshot hashing: full-resolution decode (extract_images + hash_images)
+vs the streaming thumbnail path (hash_pdf), on a PDF full of 4K images.
+
+Each path runs in a fresh interpreter so peak RSS is its own.
+Run from the repository root:
+    python -m benchmarks.image_hashing
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from PIL import Image
+
+PROBE = """
+import json, resource, time
+from screenshot_check import extract_images, hash_images, hash_pdf
+
+def peak_rss_mb():
+    # VmHWM starts fresh at exec; ru_maxrss would inherit the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+result = {call}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "images": len(result["hashes"]),
+    "peak_rss_mb": peak_rss_mb(),
+}}))
+"""
+
+PATHS = [
+    ("full decode", "hash_images(extract_images({pdf!r}))"),
+    ("streaming", "hash_pdf({pdf!r})"),
+]
+
+
+def screenshot(rng, size=(3840, 2160)):
+    # Smooth gradient + UI-like blocks + noise: compresses like a real capture
+    w, h = size
+    x = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None, None]
+    arr = np.broadcast_to((x + y) / 2, (h, w, 3)).copy()
+    for _ in range(20):
+        x0, y0 = rng.integers(0, w - 400), rng.integers(0, h - 200)
+        arr[y0:y0 + 200, x0:x0 + 400] = rng.integers(0, 255, 3)
+    arr += rng.normal(0, 4, arr.shape)
+    return Image.fromarray(arr.clip(0, 255).astype(np.uint8))
+
+
+def make_pdf(path, n_images, duplicate_every=4):
+    rng = np.random.default_rng(0)
+    pages = []
+    for k in range(n_images):
+        if k and k % duplicate_every == 0:
+            pages.append(pages[-1].copy())    # bit-identical re-embed
+        else:
+            pages.append(screenshot(rng))
+    pages[0].save(path, save_all=True, append_images=pages[1:], quality=90)
+
+
+def run(call):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(call=call)],
+        capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = os.path.join(tmp, "screens.pdf")
+        make_pdf(pdf, 24)
+        size_mb = os.path.getsize(pdf) / 1e6
+
+        print(f"PDF: 24 x 3840x2160 screenshots, {size_mb:.1f} MB")
+        print(f"{'path':<12} {'seconds':>8} {'images/s':>9} {'peak RSS (MB)':>14}")
+        for label, call in PATHS:
+            r = run(call.format(pdf=pdf))
+            print(f"{label:<12} {r['seconds']:>8.2f} {r['images'] / r['seconds']:>9.1f} {r['peak_rss_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
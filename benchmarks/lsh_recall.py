@@ -0,0 +1,90 @@
+"""
+MinHash-LSH plagiarism mode vs exact all-pairs: recall and time.
+
+Recall = suspicious pairs (hybrid >= threshold) found by LSH mode /
+suspicious pairs found by exact mode, on a corpus with injected
+verbatim copies and light paraphrases.
+
+Run from the repository root:
+    python -m benchmarks.lsh_recall
+"""
+import random
+import time
+import numpy as np
+import plagiarism
+
+THRESHOLD = 0.45
+
+
+def make_vocabulary(rng, size=5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def sentence(rng, vocab, topic_share=0.6):
+    # Same-topic cohorts share most of their vocabulary
+    words = []
+    for _ in range(rng.randint(8, 16)):
+        pool = vocab[:300] if rng.random() < topic_share else vocab
+        words.append(rng.choice(pool))
+    return " ".join(words) + "."
+
+
+def paraphrase(rng, vocab, text, rate):
+    words = text.split()
+    for k in range(len(words)):
+        if rng.random() < rate:
+            words[k] = rng.choice(vocab)
+    return " ".join(words)
+
+
+def make_corpus(rng, vocab, n, copy_rate=0.15):
+    texts = []
+    for _ in range(n):
+        if texts and rng.random() < copy_rate:
+            rate = rng.choice([0.0, 0.1, 0.25])
+            texts.append(paraphrase(rng, vocab, rng.choice(texts), rate))
+        else:
+            texts.append(" ".join(sentence(rng, vocab) for _ in range(rng.randint(6, 14))))
+    return texts
+
+
+def suspicious_exact(matrix, threshold):
+    i, j = np.triu_indices(len(matrix), k=1)
+    keep = matrix[i, j] >= threshold
+    return set(zip(i[keep].tolist(), j[keep].tolist()))
+
+
+def suspicious_sparse(pairs, threshold):
+    pairs = pairs.tocoo()
+    keep = pairs.data >= threshold
+    return set(zip(pairs.row[keep].tolist(), pairs.col[keep].tolist()))
+
+
+def main():
+    rng = random.Random(5)
+    vocab = make_vocabulary(rng)
+
+    print(f"{'n':>6} {'target':>7} {'exact (s)':>10} {'lsh (s)':>9} "
+          f"{'true pairs':>11} {'recall':>8} {'scored pairs':>13}")
+    for n in [500, 2000, 5000]:
+        texts = make_corpus(rng, vocab, n)
+
+        start = time.perf_counter()
+        dense, _ = plagiarism.hybrid_similarity(texts)
+        t_exact = time.perf_counter() - start
+        truth = suspicious_exact(dense, THRESHOLD)
+
+        for target in [0.8, 0.95]:
+            start = time.perf_counter()
+            sparse, _ = plagiarism.hybrid_pairs(texts, recall=target)
+            t_lsh = time.perf_counter() - start
+            found = suspicious_sparse(sparse, THRESHOLD)
+
+            recall = len(found & truth) / len(truth) if truth else 1.0
+            print(f"{n:>6} {target:>7.2f} {t_exact:>10.2f} {t_lsh:>9.2f} "
+                  f"{len(truth):>11} {recall:>8.3f} {sparse.nnz:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Columnar merge stages vs the original iterrows/df.at loops, on
+synthetic cohorts: the screenshot merge and the semantic score fill
+of run_all.extract_features, and app.py's Matched_With column.
+Checks that both give identical columns (values and dtypes).
+
+Run from the repository root:
+    python -m benchmarks.merge_stages
+"""
+import os
+import time
+import numpy as np
+import pandas as pd
+from plagiarism_report import matched_with, risk_level
+from screenshot_check import screenshot_columns
+from semantic import SECTION_COLUMNS
+
+FOLDER = "submissions"
+
+
+# ============================================================
+#  ORIGINAL IMPLEMENTATIONS (reference)
+# ============================================================
+
+def loop_screenshots(df, screen_report, duplicates):
+    df["Screenshot_Status"] = "OK"
+    df["Screenshot_Plagiarism"] = ""
+
+    for i, row in df.iterrows():
+        path = os.path.join(FOLDER, row["File"])
+        status = screen_report.get(path, {}).get("status", "NONE")
+        df.at[i, "Screenshot_Status"] = status
+
+        if path in duplicates:
+            df.at[i, "Screenshot_Plagiarism"] = ", ".join(
+                sorted(os.path.basename(x) for x in duplicates[path])
+            )
+
+
+def loop_semantic(df, relevance):
+    for sec in SECTION_COLUMNS:
+        df[sec] = 0.0
+
+    for i in range(len(df)):
+        for sec in SECTION_COLUMNS:
+            df.at[i, sec] = round(float(relevance[sec][i]), 3)
+
+
+def loop_matched_with(df, who):
+    df["Matched_With"] = ""
+    if who is not None and not who.empty:
+        for _, r in who.iterrows():
+            a, b = r["Student_1"], r["Student_2"]
+            label = f"{r['Risk_Level']} ({r['Similarity']}%)"
+            df.loc[df["File"] == a, "Matched_With"] = label
+            df.loc[df["File"] == b, "Matched_With"] = label
+
+
+# ============================================================
+#  COLUMNAR IMPLEMENTATIONS (as in run_all / app)
+# ============================================================
+
+def columnar_screenshots(df, screen_report, duplicates):
+    df["Screenshot_Status"], df["Screenshot_Plagiarism"] = screenshot_columns(
+        df["File"], screen_report, duplicates
+    )
+
+
+def columnar_semantic(df, relevance):
+    for sec, scores in relevance.items():
+        df[sec] = np.round(scores.astype(float), 3)
+
+
+def columnar_matched_with(df, who):
+    df["Matched_With"] = matched_with(df["File"], who)
+
+
+# ============================================================
+#  SYNTHETIC COHORT
+# ============================================================
+
+def make_cohort(n, seed=0):
+    rng = np.random.default_rng(seed)
+    files = [f"S{i:06d}_Exp1_AI_GC.pdf" for i in range(n)]
+    paths = [os.path.join(FOLDER, f) for f in files]
+
+    statuses = rng.choice(["OK", "NONE", "BLANK"], n, p=[0.8, 0.15, 0.05])
+    screen_report = {p: {"status": s, "hashes": []} for p, s in zip(paths, statuses)}
+    del screen_report[paths[-1]]    # a file the screenshot pass never saw
+
+    # ~5% of files share screenshots in small groups
+    duplicates = {}
+    for group in np.array_split(rng.permutation(n)[: n // 20], max(n // 60, 1)):
+        for i in group:
+            duplicates[paths[i]] = {paths[j] for j in group if j != i}
+
+    relevance = {
+        sec: rng.random(n).astype(np.float32) for sec in SECTION_COLUMNS
+    }
+
+    # ~2 suspicious pairs per 10 files, some files in several pairs
+    m = n // 5
+    a, b = rng.integers(0, n, m), rng.integers(0, n, m)
+    sims = rng.uniform(0.45, 1.0, m)
+    who = pd.DataFrame({
+        "Student_1": [files[i] for i in a],
+        "Student_2": [files[j] for j in b],
+        "Similarity": [round(float(s) * 100, 1) for s in sims],
+        "Risk_Level": [risk_level(float(s)) for s in sims],
+    })
+
+    return pd.DataFrame({"File": files}), screen_report, duplicates, relevance, who
+
+
+def main():
+    stages = [
+        ("screenshot merge", loop_screenshots, columnar_screenshots,
+         lambda c: (c[1], c[2]), ["Screenshot_Status", "Screenshot_Plagiarism"]),
+        ("semantic fill", loop_semantic, columnar_semantic,
+         lambda c: (c[3],), SECTION_COLUMNS),
+        ("Matched_With", loop_matched_with, columnar_matched_with,
+         lambda c: (c[4],), ["Matched_With"]),
+    ]
+
+    print(f"{'rows':>7} {'stage':<17} {'loop (s)':>9} {'columnar (s)':>13} {'speed-up':>9} {'identical':>10}")
+    for n in [1_000, 10_000]:
+        cohort = make_cohort(n)
+        for name, loop, columnar, args, columns in stages:
+            legacy = cohort[0].copy()
+            start = time.perf_counter()
+            loop(legacy, *args(cohort))
+            t_loop = time.perf_counter() - start
+
+            fast = cohort[0].copy()
+            start = time.perf_counter()
+            columnar(fast, *args(cohort))
+            t_fast = time.perf_counter() - start
+
+            try:
+                pd.testing.assert_frame_equal(legacy[columns], fast[columns], check_exact=True)
+                identical = "yes"
+            except AssertionError:
+                identical = "NO"
+            print(f"{n:>7} {name:<17} {t_loop:>9.3f} {t_fast:>13.4f} "
+                  f"{t_loop / t_fast:>8.0f}x {identical:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Stage timings of a whole evaluation at several cohort sizes, on
+synthetic reports from benchmarks.corpus, saved as a JSON baseline.
+
+Per cohort size:
+- extract_features + score_features with their own stage clock:
+  extraction, plagiarism_flags, screenshots, semantic, boilerplate,
+  plagiarism_matrix, marks, reports, graph
+- the extraction stage split per document on a sample (serial):
+  parse, section_detection, screenshot_hashing
+
+Run from the repository root:
+    python -m benchmarks.pipeline --record --sizes 10 100
+    python -m benchmarks.pipeline
+
+--record measures and writes a baseline (--out, default
+benchmarks/baseline.json). Without it the baseline (--compare) is
+re-run with its sizes and corpus settings, the results written next
+to it as .new.json, and the exit status is 1 when a stage is slower
+than --tolerance allows. Timings depend on the machine and the model,
+so record the baseline where it is compared; a missing baseline is an
+error, never silently replaced by a fresh one.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.corpus import make_corpus
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+TOPIC = "Supervised learning with linear models"
+
+
+# ============================================================
+#  MEASUREMENT
+# ============================================================
+
+def per_document(pdf_paths):
+    """Mean milliseconds per document of each extraction sub-stage."""
+    from evaluator import evaluate
+    from pdf_document import load_document
+    from screenshot_check import hash_document
+
+    totals = {"parse": 0.0, "section_detection": 0.0, "screenshot_hashing": 0.0}
+    for path in pdf_paths:
+        t0 = time.perf_counter()
+        doc = load_document(path)
+        t1 = time.perf_counter()
+        evaluate(path, doc)
+        t2 = time.perf_counter()
+        hash_document(doc)
+        t3 = time.perf_counter()
+        totals["parse"] += t1 - t0
+        totals["section_detection"] += t2 - t1
+        totals["screenshot_hashing"] += t3 - t2
+
+    return {name: 1000 * seconds / len(pdf_paths) for name, seconds in totals.items()}
+
+
+def measure(n, corpus_options, workers, mode, sample):
+    from rescore import score_features
+    from run_all import extract_features
+
+    with tempfile.TemporaryDirectory() as folder:
+        t0 = time.perf_counter()
+        manifest = make_corpus(folder, n, **corpus_options)
+        generated = time.perf_counter() - t0
+
+        pdf_paths = [os.path.join(folder, m["name"]) for m in manifest]
+        stages = {}
+
+        def progress(event, **info):
+            if event == "stage":
+                stages[info["name"]] = stages.get(info["name"], 0.0) + info["seconds"]
+
+        t0 = time.perf_counter()
+        features = extract_features(folder, TOPIC, workers=workers, plagiarism_mode=mode,
+                                    progress=progress)
+        score_features(features, progress=progress)
+        total = time.perf_counter() - t0
+
+        return {
+            "documents": n,
+            "copies": sum(m["source"] is not None for m in manifest),
+            "screenshots": sum(m["screenshots"] for m in manifest),
+            "megabytes": sum(os.path.getsize(p) for p in pdf_paths) / 1e6,
+            "generate_s": generated,
+            "total_s": total,
+            "stages_s": stages,
+            "per_document_ms": per_document(pdf_paths[:sample]),
+        }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "commit": commit,
+    }
+
+
+# ============================================================
+#  BASELINE COMPARISON
+# ============================================================
+
+def compare(old, new, tolerance, min_delta):
+    """[(size, stage, old s, new s)] of stages slower than allowed."""
+    slower = []
+    for size, before in old["results"].items():
+        after = new["results"].get(size)
+        if after is None:
+            continue
+        pairs = [("total", before["total_s"], after["total_s"])]
+        pairs += [(stage, s, after["stages_s"].get(stage)) for stage, s in before["stages_s"].items()]
+        for stage, ms in before["per_document_ms"].items():
+            pairs.append((stage + " (per doc)", ms / 1000, after["per_document_ms"][stage] / 1000))
+
+        for stage, a, b in pairs:
+            if b is not None and b > a * (1 + tolerance) and b - a > min_delta:
+                slower.append((size, stage, a, b))
+    return slower
+
+
+def print_results(results):
+    stages = sorted({s for r in results.values() for s in r["stages_s"]})
+    print(f"{'docs':>6} {'total (s)':>10} " + " ".join(f"{s[:12]:>12}" for s in stages))
+    for size, r in results.items():
+        print(f"{size:>6} {r['total_s']:>10.2f} "
+              + " ".join(f"{r['stages_s'].get(s, float('nan')):>12.3f}" for s in stages))
+
+    print(f"\n{'docs':>6} {'parse ms/doc':>13} {'sections ms/doc':>16} {'screens ms/doc':>15}")
+    for size, r in results.items():
+        ms = r["per_document_ms"]
+        print(f"{size:>6} {ms['parse']:>13.1f} {ms['section_detection']:>16.2f} "
+              f"{ms['screenshot_hashing']:>15.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every evaluation stage on synthetic cohorts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="extraction processes; 0 = one per core (default)")
+    parser.add_argument("--mode", choices=["exact", "lsh"], default="exact")
+    parser.add_argument("--sample", type=int, default=50,
+                        help="documents timed one by one for the per-document split")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--copy-rate", type=float, default=0.15)
+    parser.add_argument("--record", action="store_true",
+                        help="write a new baseline instead of comparing against one")
+    parser.add_argument("--out", default=DEFAULT_BASELINE,
+                        help="where --record writes the baseline")
+    parser.add_argument("--compare", default=DEFAULT_BASELINE,
+                        help="baseline to compare against (re-uses its settings)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slow-down before a stage counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="ignore slow-downs smaller than this many seconds")
+    args = parser.parse_args()
+
+    settings = {
+        "sizes": args.sizes, "workers": args.workers, "mode": args.mode, "sample": args.sample,
+        "corpus": {"seed": args.seed, "pages": args.pages, "copy_rate": args.copy_rate},
+    }
+    old = None
+    if not args.record:
+        if not os.path.exists(args.compare):
+            parser.error(f"no baseline at {args.compare}; record one on this machine "
+                         "with --record first")
+        with open(args.compare) as f:
+            old = json.load(f)
+        settings = old["settings"]
+
+    # Model loading is a one-off start-up cost, not a stage
+    import semantic
+    t0 = time.perf_counter()
+    semantic.warm_up()
+    model_load = time.perf_counter() - t0
+
+    results = {}
+    for n in settings["sizes"]:
+        print(f"{n} documents ...", file=sys.stderr)
+        results[str(n)] = measure(n, settings["corpus"], settings["workers"],
+                                  settings["mode"], settings["sample"])
+
+    new = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "settings": settings,
+        "model_load_s": model_load,
+        "results": results,
+    }
+    print_results(results)
+
+    out = args.out if old is None else os.path.splitext(args.compare)[0] + ".new.json"
+    with open(out, "w") as f:
+        json.dump(new, f, indent=2)
+    print(f"\nwritten to {out}")
+
+    if old is not None:
+        slower = compare(old, new, args.tolerance, args.min_delta)
+        for size, stage, a, b in slower:
+            ratio = f" ({b / a:.2f}x)" if a else ""
+            print(f"REGRESSION {size} docs, {stage}: {a:.3f}s -> {b:.3f}s{ratio}")
+        if slower:
+            sys.exit(1)
+        print(f"no stage slower than {args.tolerance:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
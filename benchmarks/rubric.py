@@ -0,0 +1,119 @@
+"""
+marks.score_marks (vectorized rubric) vs the original row-wise
+compute_marks under df.apply, on synthetic result tables.
+Checks that both give identical frames (values and dtypes).
+
+Run from the repository root:
+    python -m benchmarks.rubric
+"""
+import time
+import numpy as np
+import pandas as pd
+from marks import score_marks
+
+
+# ============================================================
+#  ORIGINAL IMPLEMENTATION (reference)
+# ============================================================
+
+def loop_compute_marks(row):
+    raw = 0
+
+    raw += 5 if row.get("Filename_OK") else 0
+    raw += 25 if row.get("Missing_Sections") == "" else 0
+
+    theory_words = row.get("Theory_Words", 0)
+    if 200 <= theory_words <= 300:
+        raw += 10
+    elif theory_words > 300:
+        raw += 5
+
+    raw += 10 if row.get("Screenshots") else 0
+    raw += 15 if row.get("Implementation_Present") else 0
+
+    if row.get("Plagiarism") == "LOW":
+        raw += 15
+    elif row.get("Plagiarism") == "MEDIUM":
+        raw += 7
+
+    if row.get("Analysis_Present") and row.get("Conclusion_Present"):
+        raw += 10
+
+    raw = min(raw, 100)
+
+    ai_likelihood = 0.0
+    if row.get("Plagiarism") == "LOW" and theory_words >= 150:
+        ai_likelihood += 0.4
+    if row.get("Missing_Sections") == "" and 120 <= theory_words <= 300:
+        ai_likelihood += 0.3
+    if not row.get("Screenshots") and theory_words > 200:
+        ai_likelihood += 0.3
+    ai_likelihood = min(round(ai_likelihood, 2), 1.0)
+
+    regulated = raw
+    if ai_likelihood > 0.7:
+        regulated = min(regulated, 65)
+    elif ai_likelihood > 0.4:
+        regulated = min(regulated, 80)
+
+    if regulated >= 85:
+        final_5 = 5
+    elif regulated >= 70:
+        final_5 = 4
+    elif regulated >= 55:
+        final_5 = 3
+    elif regulated >= 40:
+        final_5 = 2
+    else:
+        final_5 = 1
+
+    return {
+        "Raw_Marks": round(raw, 1),
+        "Regulated_Marks": round(regulated, 1),
+        "Final_Marks_5": final_5,
+        "AI_Likelihood": ai_likelihood,
+        "Total_Marks": round(regulated, 1)
+    }
+
+
+def make_results(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Word counts cluster around the rubric's band edges
+    edges = np.array([0, 119, 120, 149, 150, 199, 200, 201, 300, 301, 450])
+    words = np.where(rng.random(n) < 0.5, rng.choice(edges, n), rng.integers(0, 500, n))
+    return pd.DataFrame({
+        "File": [f"S{i:06d}_Exp1_AI_GC.pdf" for i in range(n)],
+        "Filename_OK": rng.random(n) < 0.8,
+        "Missing_Sections": rng.choice(["", "Aim", "Theory, Conclusion"], n, p=[0.6, 0.25, 0.15]),
+        "Theory_Words": words,
+        "Screenshots": rng.choice([0, 0, 1, 3, 8], n),
+        "Implementation_Present": rng.random(n) < 0.7,
+        "Analysis_Present": rng.random(n) < 0.7,
+        "Conclusion_Present": rng.random(n) < 0.7,
+        "Plagiarism": rng.choice(["LOW", "MEDIUM", "HIGH"], n, p=[0.7, 0.2, 0.1]),
+    })
+
+
+def main():
+    print(f"{'rows':>8} {'apply (s)':>10} {'vectorized (s)':>15} {'speed-up':>9} {'identical':>10}")
+    for n in [1_000, 10_000, 100_000]:
+        df = make_results(n)
+
+        start = time.perf_counter()
+        legacy = df.apply(loop_compute_marks, axis=1, result_type="expand")
+        t_loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = score_marks(df)
+        t_fast = time.perf_counter() - start
+
+        try:
+            pd.testing.assert_frame_equal(legacy, fast, check_exact=True)
+            identical = "yes"
+        except AssertionError:
+            identical = "NO"
+        print(f"{n:>8} {t_loop:>10.3f} {t_fast:>15.4f} {t_loop / t_fast:>8.0f}x {identical:>10}")
+
+
+if __name__ == "__main__":
+    main()
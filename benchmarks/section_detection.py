@@ -0,0 +1,87 @@
+"""
+Section detection: compiled SectionMatcher vs the original window scan.
+
+Run from the repository root:
+    python -m benchmarks.section_detection
+"""
+import random
+import time
+from evaluator import SECTION_ALIASES, SECTION_MATCHER
+
+FILLER = (
+    "the model was trained on the given input and we observe that "
+    "values change with each epoch of learning for this lab task"
+).split()
+
+ALIAS_TOKENS = sorted({t for aliases in SECTION_ALIASES.values() for a in aliases for t in a.split()})
+
+
+# ============================================================
+#  ORIGINAL IMPLEMENTATION (reference)
+# ============================================================
+
+def window_scan_exists(norm_text, aliases):
+    words = norm_text.split()
+
+    for alias in aliases:
+        alias_tokens = set(alias.split())
+        window = len(alias_tokens) + 4
+
+        for i in range(len(words) - window + 1):
+            chunk = set(words[i:i+window])
+            if alias_tokens.issubset(chunk):
+                return True
+
+    return False
+
+
+def window_scan(norm_text):
+    return {s: window_scan_exists(norm_text, a) for s, a in SECTION_ALIASES.items()}
+
+
+# ============================================================
+#  SYNTHETIC DOCUMENTS
+# ============================================================
+
+def make_doc(rng, n_words, alias_rate):
+    words = []
+    for _ in range(n_words):
+        if rng.random() < alias_rate:
+            words.append(rng.choice(ALIAS_TOKENS))
+        else:
+            words.append(rng.choice(FILLER))
+    return " ".join(words)
+
+
+def check_equivalence(rng, trials=2000):
+    for _ in range(trials):
+        doc = make_doc(rng, rng.randint(0, 40), rng.choice([0.0, 0.02, 0.1, 0.4]))
+        assert SECTION_MATCHER.match(doc) == window_scan(doc), doc
+
+
+def time_it(fn, doc, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(doc)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    rng = random.Random(7)
+    check_equivalence(rng)
+    print("equivalence: OK (short random documents)")
+
+    print(f"{'words':>8} {'window scan (ms)':>18} {'matcher (ms)':>14} {'speedup':>9}")
+    for n_words in [1_000, 10_000, 50_000]:
+        # Sparse headings: the common case where the scan runs long
+        doc = make_doc(rng, n_words, 0.002)
+        assert SECTION_MATCHER.match(doc) == window_scan(doc)
+
+        repeat = 3 if n_words > 10_000 else 10
+        old = time_it(window_scan, doc, repeat)
+        new = time_it(SECTION_MATCHER.match, doc, repeat)
+        print(f"{n_words:>8} {old * 1000:>18.2f} {new * 1000:>14.2f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Import-time / resident-memory benchmark for app start-up.
+
+Each case runs in a fresh interpreter so nothing is pre-imported.
+Run from the repository root:
+    python -m benchmarks.startup
+"""
+import json
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("torch", "sentence_transformers", "sklearn", "pyvis") if m in sys.modules]
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": rss_kb / 1024, "heavy": heavy}}))
+"""
+
+CASES = [
+    ("import run_all", "import run_all"),
+    ("import semantic", "import semantic"),
+    ("first model use", "import semantic\nsemantic.get_model()"),
+]
+
+
+def run_case(code):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(code=code)],
+        capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'case':<18} {'seconds':>8} {'peak RSS (MB)':>14}  heavy modules loaded")
+    for label, code in CASES:
+        r = run_case(code)
+        if r is None:
+            print(f"{label:<18} {'failed':>8}")
+            continue
+        print(f"{label:<18} {r['seconds']:>8.2f} {r['peak_rss_mb']:>14.1f}  {', '.join(r['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
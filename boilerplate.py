@@ -0,0 +1,162 @@
+import re
+from collections import Counter
+
+# ============================================================
+#  DEFAULTS
+# ============================================================
+
+# Institution headers stripped from every text, as substrings
+STATIC_BOILERPLATE = (
+    "ramdeobaba", "rcoem", "experiment", "aim", "objective",
+    "department", "computer science", "data science",
+    "university", "semester", "roll no", "name:", "date:"
+)
+
+DEFAULT_MIN_SHARE = 0.6    # phrase in more than 60% of documents → template
+DEFAULT_NGRAM = 6          # words per shared n-gram
+DEFAULT_MIN_LINE_WORDS = 3
+DEFAULT_MIN_DOCS = 10      # below this, two copies would already look like a template
+
+
+# ============================================================
+#  DETECTION
+# ============================================================
+
+def _lines(text):
+    return [" ".join(line.split()) for line in text.lower().splitlines()]
+
+
+def find_boilerplate(texts, min_share=DEFAULT_MIN_SHARE, ngram=DEFAULT_NGRAM,
+                     min_line_words=DEFAULT_MIN_LINE_WORDS, min_docs=DEFAULT_MIN_DOCS):
+    """
+    Lower-cased phrases shared by more than min_share of the texts:
+    whole lines (lab-manual headers) of at least min_line_words words,
+    and runs of shared word n-grams (provided problem statements),
+    merged per text into the longest run. Cohorts smaller than
+    min_docs return [] so that copied text is never mistaken for a
+    template.
+    """
+    if len(texts) < max(min_docs, 1):
+        return []
+
+    line_df = Counter()
+    gram_df = Counter()
+    tokenized = []
+    for text in texts:
+        lines = _lines(text)
+        line_df.update({line for line in lines if len(line.split()) >= min_line_words})
+        words = " ".join(lines).split()
+        tokenized.append(words)
+        gram_df.update({tuple(words[i:i + ngram]) for i in range(len(words) - ngram + 1)})
+
+    limit = min_share * len(texts)
+    phrases = {line for line, count in line_df.items() if count > limit}
+    shared = {gram for gram, count in gram_df.items() if count > limit}
+
+    # Consecutive shared n-grams form one phrase, so overlapping
+    # n-grams of a long paragraph are stripped as a whole
+    if shared:
+        for words in tokenized:
+            start = None
+            for i in range(len(words) - ngram + 2):
+                hit = i <= len(words) - ngram and tuple(words[i:i + ngram]) in shared
+                if hit and start is None:
+                    start = i
+                elif not hit and start is not None:
+                    phrases.add(" ".join(words[start:i - 1 + ngram]))
+                    start = None
+
+    return sorted(phrases)
+
+
+# ============================================================
+#  CLEANER
+# ============================================================
+
+def _trie_pattern(phrases):
+    """
+    Regex alternation of phrases as a character trie, so matching
+    follows one branch instead of trying every phrase; the longest
+    phrase wins at each position. A space matches any whitespace run
+    (phrases are whitespace-collapsed, texts are not).
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def char(ch):
+        return r"\s+" if ch == " " else re.escape(ch)
+
+    def build(node):
+        branches = []
+        for ch, child in sorted(node.items()):
+            if ch == "":
+                continue
+            # Follow single-child chains iteratively (phrases can be long)
+            chain = [char(ch)]
+            while len(child) == 1 and "" not in child:
+                (ch, child), = child.items()
+                chain.append(char(ch))
+            branches.append("".join(chain) + build(child))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie) if trie else None
+
+
+# Characters str.isdigit() accepts besides \d (decimal digits):
+# superscripts, circled and other numbered forms (Unicode 14)
+_OTHER_DIGITS = (
+    "\u00b2-\u00b3\u00b9\u1369-\u1371\u19da\u2070\u2074-\u2079\u2080-\u2089"
+    "\u2460-\u2468\u2474-\u247c\u2488-\u2490\u24ea\u24f5-\u24fd\u24ff"
+    "\u2776-\u277e\u2780-\u2788\u278a-\u2792\U00010a40-\U00010a43"
+    "\U00010e60-\U00010e68\U00011052-\U0001105a\U0001f100-\U0001f10a"
+)
+_DIGITS = re.compile(r"[\d" + _OTHER_DIGITS + "]")
+
+
+def compile_cleaner(phrases=(), static=STATIC_BOILERPLATE):
+    """
+    text -> cleaned text: lower-cased; the detected phrases removed
+    (whole words only, in one regex scan); then each static substring
+    replaced in list order, so one removal can expose another
+    ("aexperimentim" -> "aim" -> ""); then every digit character
+    dropped and whitespace collapsed. Without phrases this is exactly
+    the original replace / isdigit loop.
+    """
+    pattern = _trie_pattern(phrases)
+    detected = re.compile(r"(?<!\w)" + pattern + r"(?!\w)") if pattern else None
+    static = tuple(static)
+
+    def clean(text):
+        text = text.lower()
+        if detected:
+            text = detected.sub("", text)
+        for junk in static:
+            text = text.replace(junk, "")
+        return " ".join(_DIGITS.sub("", text).split())
+
+    return clean
+
+
+def strip_boilerplate(texts, cleaner=None):
+    """texts cleaned by cleaner (default: compile_cleaner(), the static list only)."""
+    cleaner = cleaner or compile_cleaner()
+    return [cleaner(text) for text in texts]
+
+
+def clean_cohort(texts, min_share=DEFAULT_MIN_SHARE, **options):
+    """
+    (cleaned texts, detected phrases): find_boilerplate over the
+    cohort, then strip_boilerplate with those phrases and the static
+    list. min_share=None skips detection (static list only).
+    """
+    phrases = [] if min_share is None else find_boilerplate(texts, min_share, **options)
+    return strip_boilerplate(texts, compile_cleaner(phrases)), phrases
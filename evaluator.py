@@ -1,7 +1,6 @@
 import os
 import re
-import pdfplumber
-from PyPDF2 import PdfReader
+from pdf_document import load_document
 
 # ============================================================
 #  SECTION → ALIASES (what students actually write)
@@ -45,23 +44,7 @@ REQUIRED_HEADINGS = list(SECTION_ALIASES.keys())
 # ============================================================
 
 def extract_text(pdf_path):
-    try:
-        full = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    full += t + "\n"
-
-                try:
-                    words = page.extract_words()
-                    for w in words:
-                        full += " " + w["text"]
-                except:
-                    pass
-        return full
-    except:
-        return ""
+    return load_document(pdf_path).text()
 
 
 def normalize(text):
@@ -75,19 +58,86 @@ def normalize(text):
 #  TOKEN-WINDOW SEMANTIC DETECTOR
 # ============================================================
 
-def section_exists(norm_text, aliases):
-    words = norm_text.split()
+class SectionMatcher:
+    """
+    All aliases compiled into one token → alias index, so a document
+    is scanned once for every section.
+
+    Same rule as the original window scan: an alias matches when all
+    its tokens fall inside some window of len(tokens) + 4 words, and
+    a document shorter than that window never matches.
+    """
+
+    def __init__(self, section_aliases):
+        self.sections = list(section_aliases)
+        self.aliases = []      # [(section, tokens, window)]
+        self.index = {}        # token -> [alias ids]
+
+        for section, aliases in section_aliases.items():
+            for alias in aliases:
+                tokens = frozenset(alias.split())
+                if not tokens:
+                    continue
+                alias_id = len(self.aliases)
+                self.aliases.append((section, tokens, len(tokens) + 4))
+                for t in tokens:
+                    self.index.setdefault(t, []).append(alias_id)
+
+    def scanner(self):
+        return SectionScan(self)
+
+    def match(self, norm_text):
+        """Returns {section: bool} in SECTION_ALIASES order."""
+        scan = self.scanner()
+        scan.feed(norm_text.split())
+        return scan.result()
+
+
+class SectionScan:
+    """
+    Incremental SectionMatcher pass: feed() normalized words chunk by
+    chunk (positions carry over), then result().
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.pos = 0
+        # Shortest span (in words) seen so far covering each alias
+        self.best = [None] * len(matcher.aliases)
+        self.last_seen = [{} for _ in matcher.aliases]
+
+    def feed(self, words):
+        aliases, index = self.matcher.aliases, self.matcher.index
+        best, last_seen = self.best, self.last_seen
+
+        for pos, w in enumerate(words, self.pos):
+            for alias_id in index.get(w, ()):
+                _, tokens, _ = aliases[alias_id]
+                if best[alias_id] == len(tokens):
+                    continue    # cannot get any tighter
+                seen = last_seen[alias_id]
+                seen[w] = pos
+                if len(seen) == len(tokens):
+                    span = pos - min(seen.values()) + 1
+                    if best[alias_id] is None or span < best[alias_id]:
+                        best[alias_id] = span
+
+        self.pos += len(words)
+
+    def result(self):
+        found = {section: False for section in self.matcher.sections}
+        for alias_id, (section, _, window) in enumerate(self.matcher.aliases):
+            span = self.best[alias_id]
+            if span is not None and span <= window <= self.pos:
+                found[section] = True
+        return found
+
 
-    for alias in aliases:
-        alias_tokens = set(alias.split())
-        window = len(alias_tokens) + 4
+def section_exists(norm_text, aliases):
+    return SectionMatcher({"_": aliases}).match(norm_text)["_"]
 
-        for i in range(len(words) - window + 1):
-            chunk = set(words[i:i+window])
-            if alias_tokens.issubset(chunk):
-                return True
 
-    return False
+SECTION_MATCHER = SectionMatcher(SECTION_ALIASES)
 
 
 # ============================================================
@@ -95,65 +145,106 @@ def section_exists(norm_text, aliases):
 # ============================================================
 
 def count_images(pdf_path):
-    try:
-        reader = PdfReader(pdf_path)
-        count = 0
-        for page in reader.pages:
-            res = page.get("/Resources", {})
-            if "/XObject" in res:
-                xobj = res["/XObject"].get_object()
-                for o in xobj:
-                    try:
-                        if xobj[o]["/Subtype"] == "/Image":
-                            count += 1
-                    except:
-                        pass
-        return count
-    except:
-        return 0
+    return load_document(pdf_path).image_count()
 
 
 # ============================================================
 #  THEORY EXTRACTION
 # ============================================================
 
+THEORY_PATTERNS = [
+    r"theory\s*[:\-]?\s*(.*?)(algorithm|methodology|procedure|steps)",
+    r"theory\s*[:\-]?\s*(.*?)(dataset|implementation|code)",
+]
+
+FIRST_THEORY_END = re.compile(r"algorithm|methodology|procedure|steps", re.I)
+
+
+class TheoryScan:
+    """
+    extract_theory over a stream of page chunks.
+
+    Both patterns can only start at the first "theory", so text
+    before it is never kept, and buffering stops as soon as the
+    first pattern's terminator shows up.
+    """
+
+    def __init__(self):
+        self.buffer = None
+        self.closed = False
+        self.present = False
+
+    def feed(self, chunk):
+        if not self.present and re.search(r"\btheory\b", chunk, re.I):
+            self.present = True
+
+        if self.closed:
+            return
+
+        start = 0
+        if self.buffer is None:
+            m = re.search("theory", chunk, re.I)
+            if not m:
+                return
+            self.buffer = []
+            chunk = chunk[m.start():]
+            start = len("theory")
+
+        self.buffer.append(chunk)
+        if FIRST_THEORY_END.search(chunk, start):
+            self.closed = True
+
+    def result(self):
+        if self.buffer:
+            text = "".join(self.buffer)
+            for p in THEORY_PATTERNS:
+                m = re.search(p, text, re.S | re.I)
+                if m:
+                    return m.group(1)
+
+        if self.present:
+            return "__THEORY_PRESENT__"
+
+        return ""
+
+
 def extract_theory(text):
-    patterns = [
-        r"theory\s*[:\-]?\s*(.*?)(algorithm|methodology|procedure|steps)",
-        r"theory\s*[:\-]?\s*(.*?)(dataset|implementation|code)",
-    ]
+    scan = TheoryScan()
+    scan.feed(text)
+    return scan.result()
 
-    for p in patterns:
-        m = re.search(p, text, re.S | re.I)
-        if m:
-            return m.group(1)
 
-    if re.search(r"\btheory\b", text, re.I):
-        return "__THEORY_PRESENT__"
+# ============================================================
+#  FILENAME CONVENTION
+# ============================================================
 
-    return ""
+def filename_ok(filename):
+    return bool(re.match(r".+_Exp\d+_AI_GC\.pdf", filename))
 
 
 # ============================================================
 #  MAIN EVALUATION
 # ============================================================
 
-def evaluate(pdf_path):
+def evaluate(pdf_path, doc=None):
     filename = os.path.basename(pdf_path)
 
-    raw_text = extract_text(pdf_path)
-    norm_text = normalize(raw_text)
+    # Reuse an already-parsed document when the caller has one
+    if doc is None:
+        doc = load_document(pdf_path)
 
-    missing = []
-    found = {}
+    # Stream page chunks through both detectors; the whole
+    # document text is never assembled
+    sections = SECTION_MATCHER.scanner()
+    theory_scan = TheoryScan()
+    for chunk in doc.iter_text():
+        sections.feed(normalize(chunk).split())
+        theory_scan.feed(chunk)
 
-    for section, aliases in SECTION_ALIASES.items():
-        exists = section_exists(norm_text, aliases)
-        found[section] = exists
-        if not exists:
-            missing.append(section)
+    found = sections.result()
+    missing = [section for section, exists in found.items() if not exists]
 
-    theory = extract_theory(raw_text)
+    theory = theory_scan.result()
 
     if theory == "__THEORY_PRESENT__":
         theory_words = 1
@@ -162,10 +253,10 @@ def evaluate(pdf_path):
 
     return {
         "File": filename,
-        "Filename_OK": bool(re.match(r".+_Exp\d+_AI_GC\.pdf", filename)),
+        "Filename_OK": filename_ok(filename),
         "Missing_Sections": ", ".join(missing),
         "Theory_Words": theory_words,
-        "Screenshots": count_images(pdf_path) > 0,
+        "Screenshots": doc.image_count() > 0,
         "Implementation_Present": found["Implementation"],
         "Analysis_Present": found["Result Analysis"],
         "Conclusion_Present": found["Conclusion"],
@@ -0,0 +1,127 @@
+import os
+import time
+import tracemalloc
+from functools import partial
+import evaluator
+from parallel import resolve_workers, run_isolated
+from pdf_document import PDFDocument, load_document
+from screenshot_check import ScreenshotHasher, hash_images
+from sources import Member, pdf_name, pdf_sha256, pdf_size
+
+# ============================================================
+#  PER-PDF STAGE (runs inside pool workers)
+# ============================================================
+
+def _process(pdf):
+    # Images are hashed while the PDF is read and never kept
+    hasher = ScreenshotHasher()
+    data = pdf.data if isinstance(pdf, Member) else None
+    doc = load_document(pdf_name(pdf), on_image=hasher.add, data=data)
+    return doc, (evaluator.evaluate(pdf_name(pdf), doc), hasher.result())
+
+
+def process_pdf(pdf):
+    """
+    Everything that only needs one file: text extraction, section
+    detection and screenshot hashing. pdf: a path or a sources.Member.
+
+    Returns (evaluation record, screenshot report entry).
+    """
+    return _process(pdf)[1]
+
+
+def measure_pdf(pdf, trace_memory=False):
+    """
+    (process_pdf result, cost); cost holds seconds, cpu_seconds,
+    pages, images, bytes and, with trace_memory, peak_bytes (Python
+    allocations, via tracemalloc).
+    """
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if trace_memory:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    t0, c0 = time.perf_counter(), time.process_time()
+
+    doc, result = _process(pdf)
+
+    cost = {
+        "seconds": time.perf_counter() - t0,
+        "cpu_seconds": time.process_time() - c0,
+        "pages": len(doc.pages),
+        "images": doc.image_count(),
+        "bytes": pdf_size(pdf),
+    }
+    if trace_memory:
+        cost["peak_bytes"] = tracemalloc.get_traced_memory()[1] - base
+    if started:
+        tracemalloc.stop()
+    return result, cost
+
+
+def failed_result(pdf):
+    # Same outcome as an unreadable PDF
+    return evaluator.evaluate(pdf_name(pdf), PDFDocument(pdf_name(pdf))), hash_images([])
+
+
+def extract_all(pdfs, workers=1, cache=None, progress=None, metrics=None):
+    """
+    Results of process_pdf in input order.
+
+    pdfs: paths and/or sources.Member objects (PDFs already in memory);
+    any iterable, consumed lazily: an item is only taken once the pool
+    has room, so at most two per worker are held at a time.
+    cache: optional result_cache.ResultCache. Unchanged files are
+    served from it; only misses are parsed (and then stored).
+    progress: optional progress(event, **info) callback, sent
+    ("file", done=, total=, name=) as each file finishes; total is
+    None when pdfs has no known length.
+    metrics: optional metrics.RunMetrics, given every file's cost
+    (see measure_pdf).
+    """
+    total = len(pdfs) if isinstance(pdfs, (list, tuple)) else getattr(pdfs, "total", None)
+    measure = partial(measure_pdf, trace_memory=metrics is not None and metrics.trace_memory)
+    names, digests, results = [], [], []
+    done = [0]
+    queued = []    # input position of every PDF sent to the pool
+
+    def failed(pdf):
+        return failed_result(pdf), {"failed": True}
+
+    def report(k, cost, cached=None):
+        done[0] += 1
+        name = os.path.basename(names[k])
+        if metrics is not None:
+            metrics.add_document(name, cached=cached, **cost)
+        if progress:
+            progress("file", done=done[0], total=total, name=name)
+
+    def to_parse():
+        for pdf in pdfs:
+            k = len(names)
+            names.append(pdf_name(pdf))
+            results.append(None)
+            if cache is not None:
+                digests.append(pdf_sha256(pdf))
+                hit = cache.get(digests[k], names[k])
+                if hit is not None:
+                    results[k] = hit
+                    report(k, {"bytes": pdf_size(pdf)}, cached=True)
+                    continue
+            queued.append(k)
+            yield pdf
+
+    def parsed(i, measured):
+        k = queued[i]
+        results[k], cost = measured
+        # A fallback may be transient (MemoryError, killed worker): never cache it
+        if cache is not None and not cost.get("failed"):
+            cache.put(digests[k], results[k])
+        report(k, cost, cached=False if cache is not None else None)
+
+    run_isolated(
+        measure, to_parse(), workers, fallback=failed, on_result=parsed,
+        max_pending=2 * resolve_workers(workers)
+    )
+    return results
@@ -0,0 +1,272 @@
+import os
+import sqlite3
+import time
+import numpy as np
+import lsh
+from hash_index import hamming, hash_to_int
+
+# ============================================================
+#  DEFAULTS
+# ============================================================
+
+DEFAULT_STORE_PATH = os.path.join("cache", "fingerprints.sqlite")
+
+# Pigeonhole chunks for phash lookups: supports distances up to
+# PHASH_CHUNKS - 1 bits (see hash_index.HashIndex)
+PHASH_CHUNKS = 5
+PHASH_BITS = 64
+
+
+def _signed(h):
+    # SQLite integers are signed 64-bit
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def _unsigned(h):
+    return h + (1 << 64) if h < 0 else h
+
+
+def _phash_chunks():
+    chunks, start = [], 0
+    for c in range(PHASH_CHUNKS):
+        width = PHASH_BITS // PHASH_CHUNKS + (1 if c < PHASH_BITS % PHASH_CHUNKS else 0)
+        chunks.append((start, (1 << width) - 1))
+        start += width
+    return chunks
+
+
+def estimated_jaccard(a, b):
+    """Fraction of agreeing MinHash values; empty sets match nothing."""
+    if np.all(a == lsh.EMPTY) or np.all(b == lsh.EMPTY):
+        return 0.0
+    return float(np.mean(a == b))
+
+
+# ============================================================
+#  PERSISTENT FINGERPRINT ARCHIVE
+# ============================================================
+
+class FingerprintStore:
+    """
+    Text MinHash signatures and screenshot phashes of every archived
+    submission, across cohorts.
+
+    Lookups go through indexed tables (LSH band keys, phash chunks),
+    so checking a batch costs roughly O(batch size), not O(archive).
+    Text similarity against the archive is the MinHash estimate of
+    max(char 5-gram, word 3-gram) Jaccard; no text is stored.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, num_perm=lsh.DEFAULT_NUM_PERM,
+                 lsh_threshold=0.1, recall=0.95):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as con:
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS submissions (
+                    id         INTEGER PRIMARY KEY,
+                    sha256     TEXT UNIQUE NOT NULL,
+                    cohort     TEXT NOT NULL,
+                    name       TEXT NOT NULL,
+                    added      REAL NOT NULL,
+                    char_sig   BLOB,
+                    phrase_sig BLOB
+                );
+                CREATE TABLE IF NOT EXISTS bands (
+                    band          INTEGER NOT NULL,
+                    key           BLOB NOT NULL,
+                    submission_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, key);
+                CREATE TABLE IF NOT EXISTS phashes (
+                    chunk         INTEGER NOT NULL,
+                    key           INTEGER NOT NULL,
+                    phash         INTEGER NOT NULL,
+                    submission_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS phashes_lookup ON phashes (chunk, key);
+            """)
+
+            # Signature layout is fixed by the first run
+            bands, rows = lsh.choose_bands(num_perm, lsh_threshold, recall)
+            for key, value in [("num_perm", num_perm), ("seed", lsh.DEFAULT_SEED),
+                               ("bands", bands), ("rows", rows)]:
+                con.execute("INSERT OR IGNORE INTO meta VALUES (?, ?)", (key, str(value)))
+            meta = dict(con.execute("SELECT key, value FROM meta"))
+
+        self.num_perm = int(meta["num_perm"])
+        self.seed = int(meta["seed"])
+        self.bands = int(meta["bands"])
+        self.rows = int(meta["rows"])
+        self.chunks = _phash_chunks()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def __len__(self):
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    # -----------------------------------------
+    # Lookup
+    # -----------------------------------------
+    def match_text(self, phrase_sigs, char_sigs, exclude=(), threshold=0.45):
+        """
+        For each batch signature k: [(cohort, name, similarity)] of
+        archived submissions at or above threshold.
+        exclude: (sha256, name) pairs to skip, i.e. the batch's own
+        files (within-batch pairs are scored by run_all). The same
+        content archived under another name is still reported, and so
+        is every other batch, whatever its cohort label.
+        """
+        results = [[] for _ in range(len(phrase_sigs))]
+        exclude = set(exclude)
+
+        with self._connect() as con:
+            con.execute("CREATE TEMP TABLE IF NOT EXISTS probe (k INTEGER, band INTEGER, key BLOB)")
+            con.execute("DELETE FROM probe")
+            con.executemany("INSERT INTO probe VALUES (?, ?, ?)", (
+                (k, band, key)
+                for k, sig in enumerate(phrase_sigs) if not np.all(sig == lsh.EMPTY)
+                for band, key in self._band_keys(sig)
+            ))
+            candidates = con.execute("""
+                SELECT DISTINCT p.k, s.id, s.sha256, s.cohort, s.name, s.char_sig, s.phrase_sig
+                FROM probe p
+                JOIN bands b ON b.band = p.band AND b.key = p.key
+                JOIN submissions s ON s.id = b.submission_id
+            """).fetchall()
+            con.execute("DELETE FROM probe")
+
+        for k, _, digest, m_cohort, name, char_blob, phrase_blob in candidates:
+            if (digest, name) in exclude:
+                continue
+            sim = max(
+                estimated_jaccard(char_sigs[k], np.frombuffer(char_blob, dtype=np.uint64)),
+                estimated_jaccard(phrase_sigs[k], np.frombuffer(phrase_blob, dtype=np.uint64)),
+            )
+            if sim >= threshold:
+                results[k].append((m_cohort, name, sim))
+
+        return results
+
+    def match_phashes(self, phash_lists, exclude=(), max_distance=0):
+        """
+        For each batch file: {(cohort, name)} sharing a screenshot.
+        exclude: as in match_text.
+        """
+        if max_distance >= PHASH_CHUNKS:
+            raise ValueError(f"max_distance must be < {PHASH_CHUNKS} for the archive")
+
+        results = [set() for _ in phash_lists]
+        exclude = set(exclude)
+
+        with self._connect() as con:
+            for k, hashes in enumerate(phash_lists):
+                for h in {hash_to_int(x) for x in hashes}:
+                    rows = set()
+                    for c, (shift, mask) in enumerate(self.chunks):
+                        rows.update(con.execute("""
+                            SELECT p.phash, s.sha256, s.cohort, s.name
+                            FROM phashes p JOIN submissions s ON s.id = p.submission_id
+                            WHERE p.chunk = ? AND p.key = ?
+                        """, (c, (h >> shift) & mask)).fetchall())
+                    for phash, digest, m_cohort, name in rows:
+                        if (digest, name) in exclude:
+                            continue
+                        if hamming(_unsigned(phash), h) <= max_distance:
+                            results[k].add((m_cohort, name))
+
+        return results
+
+    # -----------------------------------------
+    # Archive
+    # -----------------------------------------
+    def add(self, digest, cohort, name, char_sig=None, phrase_sig=None, phashes=()):
+        """Archives one submission; already-archived content is skipped."""
+        with self._connect() as con:
+            cur = con.execute(
+                "INSERT OR IGNORE INTO submissions VALUES (NULL, ?, ?, ?, ?, ?, ?)",
+                (digest, cohort, name, time.time(),
+                 None if char_sig is None else char_sig.tobytes(),
+                 None if phrase_sig is None else phrase_sig.tobytes())
+            )
+            if cur.rowcount == 0:
+                return False
+            sub_id = cur.lastrowid
+
+            if phrase_sig is not None and not np.all(phrase_sig == lsh.EMPTY):
+                con.executemany(
+                    "INSERT INTO bands VALUES (?, ?, ?)",
+                    ((band, key, sub_id) for band, key in self._band_keys(phrase_sig))
+                )
+
+            rows = []
+            for h in {hash_to_int(x) for x in phashes}:
+                for c, (shift, mask) in enumerate(self.chunks):
+                    rows.append((c, (h >> shift) & mask, _signed(h), sub_id))
+            con.executemany("INSERT INTO phashes VALUES (?, ?, ?, ?)", rows)
+        return True
+
+    # -----------------------------------------
+    # Batch check + archive (used by run_all)
+    # -----------------------------------------
+    def check_and_add(self, cohort, names, digests, texts, phash_lists,
+                      threshold=0.45, max_distance=0, exclude=()):
+        """
+        Compares a batch with the archive, then archives the batch.
+        The batch's own (sha256, name) pairs are never matched, nor are
+        those in exclude (its earlier files, when checked in parts).
+
+        Returns:
+        - who rows (Student_1 / Student_2 / Similarity / Risk_Level)
+          for text matches against archived submissions
+        - per file, the set of archive labels sharing a screenshot
+        """
+        from plagiarism import text_signatures
+        from plagiarism_report import risk_level
+
+        index, char_sigs, phrase_sigs = text_signatures(texts, self.num_perm, self.seed)
+        own = set(zip(digests, names)) | set(exclude)
+
+        who_rows = []
+        for k, matches in enumerate(self.match_text(phrase_sigs, char_sigs, own, threshold)):
+            for m_cohort, m_name, sim in sorted(matches, key=lambda m: -m[2]):
+                who_rows.append({
+                    "Student_1": names[index[k]],
+                    "Student_2": archive_label(m_cohort, m_name),
+                    "Similarity": round(sim * 100, 1),
+                    "Risk_Level": risk_level(sim)
+                })
+
+        screen_matches = [
+            {archive_label(c, n) for c, n in found}
+            for found in self.match_phashes(phash_lists, own, max_distance)
+        ]
+
+        position = {i: k for k, i in enumerate(index)}
+        for i, (name, digest) in enumerate(zip(names, digests)):
+            k = position.get(i)
+            self.add(
+                digest, cohort, name,
+                char_sig=None if k is None else char_sigs[k],
+                phrase_sig=None if k is None else phrase_sigs[k],
+                phashes=phash_lists[i]
+            )
+
+        return who_rows, screen_matches
+
+
+def archive_label(cohort, name):
+    # basename()-safe: the label ends up in Screenshot_Plagiarism
+    return f"{name} [archive: {str(cohort).replace(os.sep, '-')}]"
@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+# ============================================================
+#  PERCEPTUAL HASH HELPERS
+# ============================================================
+
+HASH_BITS = 64    # imagehash.phash default (8 x 8)
+
+
+def hash_to_int(h):
+    """phash hex string (or ImageHash) -> int."""
+    return int(str(h), 16)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ============================================================
+#  MULTI-INDEX HASHING
+# ============================================================
+
+class HashIndex:
+    """
+    Near-duplicate lookup over fixed-width integer hashes.
+
+    The bits are split into max_distance + 1 chunks, one exact-match
+    table per chunk. Two hashes within max_distance bits differ in at
+    most max_distance chunks, so they agree on at least one: exact
+    chunk lookups give every candidate, a popcount confirms it.
+    With max_distance=0 this is a plain hash -> items inverted index.
+    """
+
+    def __init__(self, max_distance=0, bits=HASH_BITS):
+        self.max_distance = max_distance
+        self.bits = bits
+        self.items = defaultdict(set)    # hash -> items
+
+        n_chunks = min(max_distance + 1, bits)
+        self.chunks = []
+        start = 0
+        for c in range(n_chunks):
+            width = bits // n_chunks + (1 if c < bits % n_chunks else 0)
+            self.chunks.append((start, (1 << width) - 1))
+            start += width
+        self.tables = [defaultdict(set) for _ in self.chunks]
+
+    def _chunk_keys(self, h):
+        for (shift, mask), table in zip(self.chunks, self.tables):
+            yield table, (h >> shift) & mask
+
+    def add(self, h, item):
+        if h not in self.items:
+            for table, key in self._chunk_keys(h):
+                table[key].add(h)
+        self.items[h].add(item)
+
+    def remove(self, h, item):
+        items = self.items.get(h)
+        if not items:
+            return
+        items.discard(item)
+        if not items:
+            del self.items[h]
+            for table, key in self._chunk_keys(h):
+                table[key].discard(h)
+                if not table[key]:
+                    del table[key]
+
+    def near_hashes(self, h):
+        """Indexed hashes within max_distance bits of h (h included)."""
+        if self.max_distance == 0:
+            return {h} if h in self.items else set()
+
+        candidates = set()
+        for table, key in self._chunk_keys(h):
+            candidates |= table.get(key, set())
+        return {c for c in candidates if hamming(c, h) <= self.max_distance}
+
+    def query(self, h):
+        """Items with a hash within max_distance bits of h."""
+        found = set()
+        for c in self.near_hashes(h):
+            found |= self.items[c]
+        return found
+
+    def __len__(self):
+        return len(self.items)
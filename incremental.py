@@ -0,0 +1,334 @@
+import os
+import pickle
+import time
+import numpy as np
+from extraction import extract_all
+from hash_index import HashIndex, hash_to_int
+from plagiarism import char_ngrams, clean_for_similarity, shingle_features, word_ngrams
+from result_cache import extractor_version
+from sources import pdf_name, pdf_sha256
+
+# ============================================================
+#  INCREMENTAL HYBRID SIMILARITY
+# ============================================================
+
+class SimilarityIndex:
+    """
+    hybrid_similarity over keyed texts, kept between runs.
+
+    Jaccard (char 5-gram, word 3-gram) is pairwise, so only rows and
+    columns of new or changed texts are computed. TF-IDF cosine depends
+    on corpus-wide document frequencies, so it is re-weighted from
+    cached term counts on every call (no re-tokenising); the result is
+    bit-identical to hybrid_similarity on the same texts.
+    """
+
+    def __init__(self):
+        self.texts = {}        # key -> raw text (to spot changes)
+        self.keys = []         # row order of the matrices below
+        self.char_X, self.char_vocab = None, {}
+        self.phrase_X, self.phrase_vocab = None, {}
+        self.counts, self.terms = None, {}
+        self.jaccard = np.zeros((0, 0), dtype=np.float32)
+
+    def _drop(self, stale):
+        keep = [r for r, k in enumerate(self.keys) if k not in stale]
+        if len(keep) == len(self.keys):
+            return
+        self.keys = [self.keys[r] for r in keep]
+        self.char_X = self.char_X[keep]
+        self.phrase_X = self.phrase_X[keep]
+        self.counts = self.counts[keep]
+        self.jaccard = self.jaccard[np.ix_(keep, keep)]
+
+    def _add(self, keys, cleaned):
+        from collections import Counter
+        from scipy.sparse import csr_matrix, vstack
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        char_new, self.char_vocab = shingle_features(cleaned, char_ngrams, self.char_vocab)
+        phrase_new, self.phrase_vocab = shingle_features(cleaned, word_ngrams, self.phrase_vocab)
+
+        # Raw term counts with the same tokenizer TfidfVectorizer uses
+        analyzer = TfidfVectorizer().build_analyzer()
+        terms = dict(self.terms)
+        data, indices, indptr = [], [], [0]
+        for text in cleaned:
+            for term, count in Counter(analyzer(text)).items():
+                indices.append(terms.setdefault(term, len(terms)))
+                data.append(count)
+            indptr.append(len(indices))
+        counts_new = csr_matrix(
+            (np.asarray(data, dtype=np.int64), indices, indptr),
+            shape=(len(cleaned), len(terms))
+        )
+        self.terms = terms
+
+        if self.keys:
+            stacked = []
+            for old, new in [(self.char_X, char_new), (self.phrase_X, phrase_new),
+                             (self.counts, counts_new)]:
+                old = old.copy()
+                old.resize((old.shape[0], new.shape[1]))
+                stacked.append(vstack([old, new], format="csr"))
+            self.char_X, self.phrase_X, self.counts = stacked
+        else:
+            self.char_X, self.phrase_X, self.counts = char_new, phrase_new, counts_new
+
+        # Jaccard of the new rows against every row (new ones included)
+        m, k = len(self.keys), len(keys)
+        rows = np.maximum(
+            self._jaccard_rows(self.char_X, m),
+            self._jaccard_rows(self.phrase_X, m)
+        )
+        jaccard = np.zeros((m + k, m + k), dtype=np.float32)
+        jaccard[:m, :m] = self.jaccard
+        jaccard[m:, :] = rows
+        jaccard[:, m:] = rows.T
+        self.jaccard = jaccard
+        self.keys = self.keys + list(keys)
+
+    @staticmethod
+    def _jaccard_rows(X, start):
+        # Same float32 arithmetic as plagiarism.jaccard_upper
+        inter = (X[start:] @ X.T).tocoo()
+        out = np.zeros((X.shape[0] - start, X.shape[0]), dtype=np.float32)
+        sizes = np.asarray(X.getnnz(axis=1), dtype=np.float32)
+        union = sizes[start + inter.row] + sizes[inter.col] - inter.data
+        out[inter.row, inter.col] = inter.data / union
+        return out
+
+    def _tfidf_cosine(self, rows):
+        # TfidfVectorizer(min_df=2): sorted vocabulary, rare terms pruned
+        from sklearn.feature_extraction.text import TfidfTransformer
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        counts = self.counts[rows]
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        kept = sorted((t for t, c in self.terms.items() if df[c] >= 2))
+        if not kept:
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        X = counts[:, [self.terms[t] for t in kept]]
+        X.sort_indices()
+        tfidf = TfidfTransformer().fit_transform(X)
+        return cosine_similarity(tfidf).astype(np.float32)
+
+    def similarity(self, keys, texts):
+        """Same (hybrid, index) as hybrid_similarity(texts)."""
+        current = dict(zip(keys, texts))
+        stale = {k for k, t in self.texts.items() if current.get(k) != t}
+        self._drop(stale)
+        for k in stale:
+            del self.texts[k]
+
+        added = [k for k in keys if k not in self.texts]
+        cleaned, index = clean_for_similarity([current[k] for k in added])
+        if cleaned:
+            self._add([added[i] for i in index], cleaned)
+        self.texts.update((k, current[k]) for k in added)
+
+        _, index = clean_for_similarity(texts)
+        if len(index) < 2:
+            return None, index
+
+        row = {k: r for r, k in enumerate(self.keys)}
+        rows = [row[keys[i]] for i in index]
+
+        hybrid = np.triu(np.maximum(self._tfidf_cosine(rows), self.jaccard[np.ix_(rows, rows)]), k=1)
+        hybrid = hybrid + hybrid.T
+        np.fill_diagonal(hybrid, 1.0)
+        return hybrid, index
+
+
+# ============================================================
+#  INCREMENTAL SCREENSHOT DUPLICATES
+# ============================================================
+
+class DuplicateTracker:
+    """find_duplicates, maintained one file at a time."""
+
+    def __init__(self, max_distance=0):
+        self.max_distance = max_distance
+        self.index = HashIndex(max_distance)
+        self.hashes = {}        # pdf -> set(int)
+        self.duplicates = {}    # pdf -> set(other pdfs)
+
+    def remove(self, pdf):
+        for h in self.hashes.pop(pdf, ()):
+            self.index.remove(h, pdf)
+        for other in self.duplicates.pop(pdf, ()):
+            self.duplicates[other].discard(pdf)
+            if not self.duplicates[other]:
+                del self.duplicates[other]
+
+    def add(self, pdf, entry):
+        if entry["status"] == "NONE":
+            return
+        hashes = {hash_to_int(h) for h in entry["hashes"]}
+        self.hashes[pdf] = hashes
+        for h in hashes:
+            self.index.add(h, pdf)
+
+        others = set()
+        for h in hashes:
+            others |= self.index.query(h)
+        others.discard(pdf)
+        for other in others:
+            self.duplicates.setdefault(other, set()).add(pdf)
+        if others:
+            self.duplicates[pdf] = others
+
+
+# ============================================================
+#  STATE KEPT BETWEEN RUNS
+# ============================================================
+
+class EvaluationState:
+    """
+    Everything run_evaluation needs to redo only what changed:
+    per-file extraction results (by SHA-256), relevance scores,
+    archive matches, screenshot duplicates and the similarity rows.
+
+    Pass the same object to successive run_evaluation(state=...) calls,
+    or save()/load() it between processes.
+    """
+
+    def __init__(self):
+        self.version = extractor_version()
+        self.files = {}          # path -> (sha256, record, screenshot entry)
+        self.relevance = {}      # path -> (sha256, topic, {column: score})
+        self.archive = {}        # path -> (sha256, who rows, screenshot labels)
+        self.cohort = None       # archive cohort of this batch
+        self.archived = set()    # (sha256, name) of every file it archived
+        self.duplicates = DuplicateTracker()
+        self.flag_similarity = SimilarityIndex()
+        self.report_similarity = SimilarityIndex()
+
+    @classmethod
+    def load(cls, path):
+        """Saved state, or a fresh one if missing or from another extractor version."""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            if getattr(state, "version", None) == extractor_version():
+                return state
+        return cls()
+
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    # -----------------------------------------
+    # Per-file stages
+    # -----------------------------------------
+    def extract(self, pdfs, workers=1, cache=None, progress=None, metrics=None):
+        """
+        (records, screen_report, digests, changed paths); only new or
+        modified files are parsed, removed files are forgotten.
+        pdfs: as extraction.extract_all; records follow their order.
+        """
+        pdf_paths, digests, changed = [], [], []
+
+        def modified():
+            for pdf in pdfs:
+                path, digest = pdf_name(pdf), pdf_sha256(pdf)
+                pdf_paths.append(path)
+                digests.append(digest)
+                if path not in self.files or self.files[path][0] != digest:
+                    changed.append(path)
+                    yield pdf
+
+        # Paths are hashed up front (known progress total); in-memory
+        # members are hashed as they are read and dropped if unchanged
+        todo = list(modified()) if isinstance(pdfs, list) else modified()
+        fresh = extract_all(todo, workers, cache, progress, metrics)
+
+        gone = set(self.files) - set(pdf_paths)
+        for path in gone | set(changed):
+            self.duplicates.remove(path)
+        for path in gone:
+            del self.files[path]
+            self.relevance.pop(path, None)
+            self.archive.pop(path, None)
+
+        digest_of = dict(zip(pdf_paths, digests))
+        for path, (record, screens) in zip(changed, fresh):
+            self.files[path] = (digest_of[path], record, screens)
+
+        records = [self.files[p][1] for p in pdf_paths]
+        screen_report = {p: self.files[p][2] for p in pdf_paths}
+        return records, screen_report, digests, changed
+
+    def find_duplicates(self, screen_report, changed, max_distance=0):
+        if max_distance != self.duplicates.max_distance:
+            self.duplicates = DuplicateTracker(max_distance)
+            changed = list(screen_report)
+        for path in changed:
+            self.duplicates.add(path, screen_report[path])
+        return {p: set(o) for p, o in self.duplicates.duplicates.items()}
+
+    def relevance_scores(self, topic, pdf_paths, digests, texts):
+        """{column: ndarray} like evaluate_sections_batch, for stale rows only."""
+        from semantic import SECTION_COLUMNS, evaluate_sections_batch
+
+        stale = [
+            i for i, (p, d) in enumerate(zip(pdf_paths, digests))
+            if self.relevance.get(p, (None, None))[:2] != (d, topic)
+        ]
+        if stale:
+            fresh = evaluate_sections_batch(
+                topic, {sec: [texts[i] for i in stale] for sec in SECTION_COLUMNS}
+            )
+            for k, i in enumerate(stale):
+                self.relevance[pdf_paths[i]] = (
+                    digests[i], topic, {sec: fresh[sec][k] for sec in SECTION_COLUMNS}
+                )
+
+        return {
+            sec: np.array([self.relevance[p][2][sec] for p in pdf_paths])
+            for sec in SECTION_COLUMNS
+        }
+
+    def check_archive(self, archive, cohort, pdf_paths, names, digests, texts,
+                      screen_report, max_distance=0):
+        """
+        FingerprintStore.check_and_add for files not yet checked.
+        They are not compared with files this batch archived earlier
+        under the same cohort (within-batch pairs are scored by
+        run_all); a new cohort is compared with all of them. cohort=None
+        keeps the cohort of the first run.
+        """
+        if cohort is None:
+            cohort = self.cohort or time.strftime("%Y-%m-%d")
+        if cohort != self.cohort:
+            # A new cohort starts over: compared with everything archived before
+            self.archive.clear()
+            self.archived.clear()
+        self.cohort = cohort
+
+        todo = [
+            i for i, (p, d) in enumerate(zip(pdf_paths, digests))
+            if self.archive.get(p, (None,))[0] != d
+        ]
+        if todo:
+            rows, screens = archive.check_and_add(
+                cohort,
+                [names[i] for i in todo],
+                [digests[i] for i in todo],
+                [texts[i] for i in todo],
+                [screen_report[pdf_paths[i]]["hashes"] for i in todo],
+                max_distance=max_distance, exclude=self.archived
+            )
+            self.archived.update((digests[i], names[i]) for i in todo)
+            for k, i in enumerate(todo):
+                own = [r for r in rows if r["Student_1"] == names[i]]
+                self.archive[pdf_paths[i]] = (digests[i], own, screens[k])
+
+        rows = [r for p in pdf_paths for r in self.archive[p][1]]
+        screens = [self.archive[p][2] for p in pdf_paths]
+        return rows, screens
@@ -0,0 +1,209 @@
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from sources import ARCHIVE_SUFFIXES
+from uploads import save_uploads
+
+# ============================================================
+#  DEFAULTS
+# ============================================================
+
+DEFAULT_JOBS_PATH = os.path.join("cache", "jobs.sqlite")
+JOB_ROOT = os.path.join("uploads", "jobs")
+DEFAULT_MAX_JOBS = 2
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+# ============================================================
+#  JOB TABLE
+# ============================================================
+
+class JobStore:
+    """
+    SQLite table of evaluation jobs: status, per-file progress,
+    per-stage timings and, once finished, the pickled
+    rescore.EvaluationFeatures (re-scored on display).
+    Safe to share between threads and processes (one connection
+    per call).
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id          TEXT PRIMARY KEY,
+                    status      TEXT NOT NULL,
+                    topic       TEXT NOT NULL,
+                    options     TEXT NOT NULL,
+                    folder      TEXT NOT NULL,
+                    cache_key   TEXT,
+                    created     REAL NOT NULL,
+                    started     REAL,
+                    finished    REAL,
+                    files_done  INTEGER NOT NULL DEFAULT 0,
+                    files_total INTEGER NOT NULL DEFAULT 0,
+                    current     TEXT,
+                    stages      TEXT NOT NULL DEFAULT '{}',
+                    error       TEXT,
+                    result      BLOB
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, topic, folder, files_total, options=None, cache_key=None, job_id=None):
+        job_id = job_id or uuid.uuid4().hex
+        with self._connect() as con:
+            con.execute(
+                "INSERT INTO jobs (id, status, topic, options, folder, cache_key, created, files_total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, topic, json.dumps(options or {}), folder, cache_key,
+                 time.time(), files_total)
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        if "stages" in fields:
+            fields["stages"] = json.dumps(fields["stages"])
+        if "result" in fields:
+            fields["result"] = pickle.dumps(fields["result"], protocol=pickle.HIGHEST_PROTOCOL)
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as con:
+            con.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        """Job row as a dict (without the result), or None."""
+        with self._connect() as con:
+            con.row_factory = sqlite3.Row
+            row = con.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job.pop("result")
+        job["options"] = json.loads(job["options"])
+        job["stages"] = json.loads(job["stages"])
+        return job
+
+    def result(self, job_id):
+        """EvaluationFeatures of a finished job, else None."""
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)
+            ).fetchone()
+        return pickle.loads(row[0]) if row and row[0] is not None else None
+
+    def recent(self, limit=20):
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT id FROM jobs ORDER BY created DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self.get(job_id) for job_id, in rows]
+
+    def unfinished(self):
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created", (QUEUED, RUNNING)
+            ).fetchall()
+        return [job_id for job_id, in rows]
+
+    def find_unfinished(self, cache_key):
+        """Id of the newest queued or running job for cache_key, or None."""
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT id FROM jobs WHERE cache_key = ? AND status IN (?, ?) "
+                "ORDER BY created DESC LIMIT 1", (cache_key, QUEUED, RUNNING)
+            ).fetchone()
+        return row[0] if row else None
+
+
+# ============================================================
+#  WORKER POOL
+# ============================================================
+
+class JobRunner:
+    """
+    Runs extract_features jobs on a pool of threads, max_jobs at a time.
+
+    Every job gets its own input folder under JOB_ROOT/<job id>/, so
+    concurrent jobs never share files. Progress and stage timings are
+    written to the JobStore while the job runs; the result is stored
+    there (and in evaluation_cache under the job's cache key, if
+    given) when it finishes.
+    """
+
+    def __init__(self, store=None, max_jobs=DEFAULT_MAX_JOBS, evaluation_cache=None,
+                 result_cache=None, root=JOB_ROOT):
+        self.store = store or JobStore()
+        self.evaluation_cache = evaluation_cache
+        self.result_cache = result_cache
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="evaluation-job")
+
+        # Jobs cut short by a restart are picked up again
+        for job_id in self.store.unfinished():
+            self.store.update(job_id, status=QUEUED, files_done=0, current=None, stages={})
+            self.pool.submit(self._run, job_id)
+
+    def submit(self, uploaded, topic, cache_key=None, **options):
+        """
+        uploaded: (name, bytes) pairs: PDFs, or a single ZIP/tar
+        archive (stored as is and evaluated without unpacking).
+        options: extra extract_features keyword arguments
+        (workers, plagiarism_mode, ...).
+        Returns the job id.
+        """
+        job_id = uuid.uuid4().hex
+        folder, files = save_uploads(uploaded, job_id, root=self.root)
+        if len(files) == 1 and files[0][0].lower().endswith(ARCHIVE_SUFFIXES):
+            folder = os.path.join(folder, files[0][0])
+        self.store.create(topic, folder, len(files), options, cache_key, job_id)
+        self.pool.submit(self._run, job_id)
+        return job_id
+
+    def _run(self, job_id):
+        from metrics import RunMetrics
+        from run_all import extract_features
+
+        job = self.store.get(job_id)
+        stages = {}
+
+        def progress(event, **info):
+            if event == "file":
+                # An archive's PDF count is only known once it is opened
+                total = {"files_total": info["total"]} if info["total"] is not None else {}
+                self.store.update(job_id, files_done=info["done"], current=info["name"], **total)
+            elif event == "stage":
+                stages[info["name"]] = round(stages.get(info["name"], 0.0) + info["seconds"], 3)
+                self.store.update(job_id, stages=stages, current=None)
+
+        self.store.update(job_id, status=RUNNING, started=time.time())
+        try:
+            # Per-document costs travel with the features (app's slowest documents)
+            with RunMetrics() as metrics:
+                features = extract_features(
+                    job["folder"], job["topic"], cache=self.result_cache,
+                    progress=progress, metrics=metrics, **job["options"]
+                )
+        except Exception:
+            self.store.update(job_id, status=FAILED, finished=time.time(),
+                              error=traceback.format_exc())
+        else:
+            if self.evaluation_cache is not None and job["cache_key"]:
+                self.evaluation_cache.put(job["cache_key"], features)
+            self.store.update(job_id, status=DONE, finished=time.time(), result=features)
+        finally:
+            shutil.rmtree(os.path.join(self.root, job_id), ignore_errors=True)
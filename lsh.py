@@ -0,0 +1,161 @@
+import zlib
+import numpy as np
+
+# ============================================================
+#  MINHASH
+# ============================================================
+# Multiply-shift hashing over 32-bit shingle hashes:
+#   h_k(x) = ((a_k * x + b_k) mod 2^64) >> 32,  a_k odd
+# uint64 arithmetic wraps, so no modulo is needed.
+
+SHIFT = np.uint64(32)
+EMPTY = np.uint64(1 << 32)   # above every h_k: marks an empty shingle set
+DEFAULT_NUM_PERM = 128
+DEFAULT_SEED = 1
+
+
+def shingle_hash(shingle):
+    """Stable 32-bit hash; word n-gram tuples hash as their joined text."""
+    if not isinstance(shingle, str):
+        shingle = " ".join(shingle)
+    return zlib.crc32(shingle.encode("utf-8"))
+
+
+def vocabulary_hashes(vocab):
+    """Column hashes for a {shingle: column} vocabulary in column order."""
+    return np.fromiter((shingle_hash(s) for s in vocab), dtype=np.uint64, count=len(vocab))
+
+
+def permutations(num_perm=DEFAULT_NUM_PERM, seed=DEFAULT_SEED):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(0, 1 << 62, size=num_perm, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.randint(0, 1 << 62, size=num_perm, dtype=np.int64).astype(np.uint64)
+    return a, b
+
+
+def minhash(hashes, perms):
+    a, b = perms
+    if len(hashes) == 0:
+        return np.full(len(a), EMPTY, dtype=np.uint64)
+    x = np.asarray(hashes, dtype=np.uint64)
+    return ((a[:, None] * x[None, :] + b[:, None]) >> SHIFT).min(axis=1)
+
+
+def csr_signatures(shingles, column_hashes, perms, max_block=1 << 22):
+    """
+    One MinHash signature per row of a binary CSR shingle matrix.
+    Rows are processed in blocks of at most max_block hash values
+    (num_perm x shingles) with a single reduceat per block.
+    """
+    a, b = perms
+    n, k = shingles.shape[0], len(a)
+    sigs = np.full((n, k), EMPTY, dtype=np.uint64)
+    x_all = np.asarray(column_hashes, dtype=np.uint64)
+    indptr = shingles.indptr
+    sizes = np.diff(indptr)
+    budget = max(max_block // k, 1)
+
+    start = 0
+    while start < n:
+        end = int(np.searchsorted(indptr, indptr[start] + budget, side="right")) - 1
+        end = min(max(end, start + 1), n)
+
+        rows = start + np.flatnonzero(sizes[start:end])
+        if len(rows):
+            lo, hi = indptr[start], indptr[end]
+            x = x_all[shingles.indices[lo:hi]]
+            values = (a[:, None] * x[None, :] + b[:, None]) >> SHIFT
+            sigs[rows] = np.minimum.reduceat(values, indptr[rows] - lo, axis=1).T
+        start = end
+
+    return sigs
+
+
+# ============================================================
+#  BANDING
+# ============================================================
+
+def candidate_probability(similarity, bands, rows):
+    return 1.0 - (1.0 - similarity ** rows) ** bands
+
+
+def choose_bands(num_perm, threshold, recall):
+    """
+    Picks (bands, rows) with bands * rows <= num_perm so that a pair
+    at Jaccard == threshold becomes a candidate with probability
+    >= recall, using the most rows per band (fewest false positives).
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if candidate_probability(threshold, bands, rows) >= recall:
+            best = (bands, rows)
+    return best
+
+
+class LSHIndex:
+    """
+    Banded MinHash index. Items colliding with another item in at
+    least one band are candidate pairs.
+    """
+
+    def __init__(self, bands, rows):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = [{} for _ in range(bands)]
+
+    def _keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature):
+        if np.all(signature == EMPTY):
+            return set()
+        found = set()
+        for band, key in self._keys(signature):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+    def add(self, item, signature):
+        if np.all(signature == EMPTY):
+            return
+        for band, key in self._keys(signature):
+            self.buckets[band].setdefault(key, []).append(item)
+
+
+def candidate_pairs(signature_sets, bands, rows):
+    """
+    signature_sets: list of (n, num_perm) arrays (one per shingle type).
+    Returns sorted arrays I, J (I < J) of pairs colliding in any band
+    of any signature set. Empty shingle sets never collide.
+    """
+    I_parts, J_parts = [], []
+
+    for sigs in signature_sets:
+        live = np.flatnonzero(~np.all(sigs == EMPTY, axis=1))
+        if len(live) < 2:
+            continue
+
+        for band in range(bands):
+            block = np.ascontiguousarray(sigs[live, band * rows:(band + 1) * rows])
+            keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+            _, bucket, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+            shared = counts[bucket] > 1
+            if not shared.any():
+                continue
+
+            members, bucket = live[shared], bucket[shared]
+            order = np.argsort(bucket, kind="stable")
+            members, bucket = members[order], bucket[order]
+
+            for group in np.split(members, np.flatnonzero(np.diff(bucket)) + 1):
+                i, j = np.triu_indices(len(group), k=1)
+                I_parts.append(group[i])
+                J_parts.append(group[j])
+
+    if not I_parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    pairs = np.unique(np.stack([np.concatenate(I_parts), np.concatenate(J_parts)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
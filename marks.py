@@ -1,3 +1,164 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+#  RUBRIC (declarative)
+# ============================================================
+# A rule is ([conditions], value); all conditions must hold.
+# A condition is (column, op, *args) with op one of:
+#   "truthy" / "falsy"   Python truthiness of the cell
+#   "eq"                 cell == args[0]
+#   "between"            args[0] <= cell <= args[1]
+#   "gt" / "ge"          cell > args[0] / cell >= args[0]
+# A missing column behaves like row.get(column) -> None.
+
+def make_rubric(theory_band=(200, 300), caps=((0.7, 65), (0.4, 80)),
+                bands=((85, 5), (70, 4), (55, 3), (40, 2))):
+    """
+    The rubric with its tunable thresholds:
+    theory_band: theory word count earning full points (more → half)
+    caps: (AI likelihood above, marks capped at); first match wins
+    bands: (regulated marks at least, /5 band); below all → 1
+    """
+    low, high = theory_band
+    return {
+        # 1. Raw marks (0–100): points per criterion
+        "raw": [
+            ([("Filename_OK", "truthy")], 5),
+            ([("Missing_Sections", "eq", "")], 25),
+            ([("Theory_Words", "between", low, high)], 10),
+            ([("Theory_Words", "gt", high)], 5),
+            ([("Screenshots", "truthy")], 10),
+            ([("Implementation_Present", "truthy")], 15),
+            ([("Plagiarism", "eq", "LOW")], 15),
+            ([("Plagiarism", "eq", "MEDIUM")], 7),
+            ([("Analysis_Present", "truthy"), ("Conclusion_Present", "truthy")], 10),
+        ],
+        "raw_cap": 100,
+
+        # 2. AI likelihood (heuristic, non-punitive)
+        "ai": [
+            # Polished text but low plagiarism → possible AI
+            ([("Plagiarism", "eq", "LOW"), ("Theory_Words", "ge", 150)], 0.4),
+            # Very clean structure with medium length → AI-ish
+            ([("Missing_Sections", "eq", ""), ("Theory_Words", "between", 120, 300)], 0.3),
+            # Screenshots missing but theory strong → suspicion
+            ([("Screenshots", "falsy"), ("Theory_Words", "gt", 200)], 0.3),
+        ],
+        "ai_cap": 1.0,
+
+        # 3. Regulation (examiner-like moderation)
+        "caps": [tuple(c) for c in caps],
+
+        # 4. /5 bands (dispute-proof)
+        "bands": [tuple(b) for b in bands],
+        "floor": 1,
+    }
+
+
+RUBRIC = make_rubric()
+
+MARK_COLUMNS = ["Raw_Marks", "Regulated_Marks", "Final_Marks_5", "AI_Likelihood", "Total_Marks"]
+
+
+# ============================================================
+#  COMPILATION TO COLUMN OPERATIONS
+# ============================================================
+
+def _truthy(values):
+    """bool(cell) for every cell, without a per-row Python call where possible."""
+    if values.dtype == bool:
+        return values.to_numpy()
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        v = values.to_numpy()
+        if v.dtype.kind == "f":
+            return (v != 0) | np.isnan(v)    # NaN is truthy
+        return v != 0
+    return np.fromiter(map(bool, values.to_numpy()), dtype=bool, count=len(values))
+
+
+def _numeric(values):
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+
+
+def _condition(df, column, op, *args):
+    n = len(df)
+    if column not in df:
+        return np.full(n, op == "falsy")
+
+    values = df[column]
+    if op == "truthy":
+        return _truthy(values)
+    if op == "falsy":
+        return ~_truthy(values)
+    if op == "eq":
+        return (values == args[0]).to_numpy(dtype=bool)
+
+    x = _numeric(values)
+    if op == "between":
+        return (args[0] <= x) & (x <= args[1])
+    if op == "gt":
+        return x > args[0]
+    if op == "ge":
+        return x >= args[0]
+    raise ValueError(f"Unknown rubric op: {op!r}")
+
+
+def _rule_mask(df, conditions, cache):
+    mask = np.ones(len(df), dtype=bool)
+    for cond in conditions:
+        if cond not in cache:
+            cache[cond] = _condition(df, *cond)
+        mask &= cache[cond]
+    return mask
+
+
+def score_marks(df, rubric=RUBRIC):
+    """
+    Scores every row of df at once. Returns a DataFrame (same index)
+    with MARK_COLUMNS, identical to applying compute_marks per row.
+    """
+    n = len(df)
+    cache = {}
+
+    raw = np.zeros(n, dtype=np.int64)
+    for conditions, points in rubric["raw"]:
+        raw += np.where(_rule_mask(df, conditions, cache), points, 0)
+    raw = np.minimum(raw, rubric["raw_cap"])
+
+    # Summed in rule order like the scalar code; Python's round()
+    # is then applied per distinct value, so results match exactly
+    ai = np.zeros(n, dtype=float)
+    for conditions, weight in rubric["ai"]:
+        ai = ai + np.where(_rule_mask(df, conditions, cache), weight, 0.0)
+    levels, inverse = np.unique(ai, return_inverse=True)
+    ai = np.array([min(round(v, 2), rubric["ai_cap"]) for v in levels.tolist()], dtype=float)[inverse.ravel()]
+
+    regulated = raw.copy()
+    capped = np.zeros(n, dtype=bool)
+    for above, cap in rubric["caps"]:
+        hit = (ai > above) & ~capped
+        regulated = np.where(hit, np.minimum(regulated, cap), regulated)
+        capped |= hit
+
+    final = np.full(n, rubric["floor"], dtype=np.int64)
+    banded = np.zeros(n, dtype=bool)
+    for at_least, band in rubric["bands"]:
+        hit = (regulated >= at_least) & ~banded
+        final[hit] = band
+        banded |= hit
+
+    # float64 throughout, as df.apply(..., result_type="expand") produced
+    return pd.DataFrame({
+        "Raw_Marks": raw,
+        "Regulated_Marks": regulated,
+        "Final_Marks_5": final,
+        "AI_Likelihood": ai,
+        # backward compatibility
+        "Total_Marks": regulated,
+    }, index=df.index, dtype=float)
+
+
 def compute_marks(row):
     """
     Returns a dictionary with:
@@ -5,83 +166,11 @@ def compute_marks(row):
     - Regulated_Marks (0–100)
     - Final_Marks_5 (1–5)
     - AI_Likelihood (0–1)
-    """
-
-    # -------------------------------------------------
-    # 1. RAW MARK COMPUTATION (your original logic)
-    # -------------------------------------------------
-    raw = 0
-
-    raw += 5 if row.get("Filename_OK") else 0
-    raw += 25 if row.get("Missing_Sections") == "" else 0
-
-    theory_words = row.get("Theory_Words", 0)
-    if 200 <= theory_words <= 300:
-        raw += 10
-    elif theory_words > 300:
-        raw += 5
-
-    raw += 10 if row.get("Screenshots") else 0
-    raw += 15 if row.get("Implementation_Present") else 0
-
-    if row.get("Plagiarism") == "LOW":
-        raw += 15
-    elif row.get("Plagiarism") == "MEDIUM":
-        raw += 7
-
-    if row.get("Analysis_Present") and row.get("Conclusion_Present"):
-        raw += 10
-
-    raw = min(raw, 100)
-
-    # -------------------------------------------------
-    # 2. AI LIKELIHOOD (heuristic, non-punitive)
-    # -------------------------------------------------
-    ai_likelihood = 0.0
-
-    # Polished text but low plagiarism → possible AI
-    if row.get("Plagiarism") == "LOW" and theory_words >= 150:
-        ai_likelihood += 0.4
-
-    # Very clean structure with medium length → AI-ish
-    if row.get("Missing_Sections") == "" and 120 <= theory_words <= 300:
-        ai_likelihood += 0.3
-
-    # Screenshots missing but theory strong → suspicion
-    if not row.get("Screenshots") and theory_words > 200:
-        ai_likelihood += 0.3
-
-    ai_likelihood = min(round(ai_likelihood, 2), 1.0)
-
-    # -------------------------------------------------
-    # 3. REGULATED MARKS (examiner-like moderation)
-    # -------------------------------------------------
-    regulated = raw
-
-    if ai_likelihood > 0.7:
-        regulated = min(regulated, 65)
-    elif ai_likelihood > 0.4:
-        regulated = min(regulated, 80)
-
-    # -------------------------------------------------
-    # 4. CONVERT TO /5 (banded, dispute-proof)
-    # -------------------------------------------------
-    if regulated >= 85:
-        final_5 = 5
-    elif regulated >= 70:
-        final_5 = 4
-    elif regulated >= 55:
-        final_5 = 3
-    elif regulated >= 40:
-        final_5 = 2
-    else:
-        final_5 = 1
 
+    Single-row form of score_marks; prefer score_marks for tables.
+    """
+    marks = score_marks(pd.DataFrame([dict(row)])).iloc[0]
     return {
-        "Raw_Marks": round(raw, 1),
-        "Regulated_Marks": round(regulated, 1),
-        "Final_Marks_5": final_5,
-        "AI_Likelihood": ai_likelihood,
-        # backward compatibility
-        "Total_Marks": round(regulated, 1)
+        col: float(marks[col]) if col == "AI_Likelihood" else int(marks[col])
+        for col in MARK_COLUMNS
     }
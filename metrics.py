@@ -0,0 +1,278 @@
+import json
+import os
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:    # not on Windows
+    resource = None
+
+PROMETHEUS_PREFIX = "lab_evaluator"
+
+# Upper bounds (seconds) of the per-document time histogram
+DOCUMENT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+# ============================================================
+#  PROFILER HOOK
+# ============================================================
+
+def _call(profiler, *names):
+    # cProfile.Profile has enable()/disable(), sampling profilers
+    # (e.g. pyinstrument.Profiler) usually start()/stop()
+    for name in names:
+        if hasattr(profiler, name):
+            return getattr(profiler, name)()
+    raise TypeError(f"{type(profiler).__name__} has none of {names}")
+
+
+def _profiler_factory(profile):
+    if profile is None or profile is False:
+        return None
+    if profile is True or profile == "cprofile":
+        import cProfile
+        return cProfile.Profile
+    if callable(profile):
+        return profile
+    raise ValueError(f"unknown profiler: {profile!r}")
+
+
+def max_rss_bytes():
+    """High-water mark of this process' resident memory, or None."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024    # kB on Linux
+
+
+# ============================================================
+#  RUN METRICS
+# ============================================================
+
+class RunMetrics:
+    """
+    Per-stage and per-document metrics of one evaluation; pass it as
+    metrics= to run_evaluation / extract_features / score_features.
+
+    stages: {name: {"seconds", "cpu_seconds", "peak_bytes", "laps"}}
+    (cpu_seconds of this process only: PDFs parsed by pool workers
+    show up in their documents' cpu_seconds instead).
+    documents: one dict per extracted PDF: file, seconds, cpu_seconds,
+    peak_bytes, pages, images, bytes, cached (None without a result
+    cache), failed. Cache hits only carry file, bytes and cached.
+
+    trace_memory: measure peak_bytes (Python allocations above the
+    level at the start, via tracemalloc; slows allocation-heavy code
+    down noticeably). Without it peak_bytes is None.
+    profile: run a profiler around every stage. True / "cprofile" for
+    cProfile, or a factory returning an object with enable()/disable()
+    or start()/stop() (a sampling profiler). The profilers end up in
+    profiles[stage]. Only this process is profiled, so use workers=1
+    to see inside PDF extraction.
+
+    Use it as a context manager (or call close()) so that the profiler
+    and memory tracing stop when the run is over.
+    """
+
+    def __init__(self, trace_memory=False, profile=None):
+        self.trace_memory = trace_memory
+        self.profile = _profiler_factory(profile)
+        self.stages = {}
+        self.documents = []
+        self.profiles = {}
+        self._profiler = None
+        self._traced_here = False
+        self._base = 0
+        self._document_peak = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------------------
+    # Called by progress.StageClock and extraction.extract_all
+    # -----------------------------------------
+    def start_stage(self):
+        self._stop_profiler()    # a stage that was never lapped
+        self._document_peak = 0
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._traced_here = True
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        if self.profile is not None:
+            self._profiler = self.profile()
+            _call(self._profiler, "enable", "start")
+
+    def end_stage(self, name, seconds, cpu_seconds):
+        profiler = self._stop_profiler()
+        if profiler is not None:
+            self.profiles.setdefault(name, []).append(profiler)
+
+        peak = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Documents parsed in this process reset the peak themselves
+            peak = max(tracemalloc.get_traced_memory()[1] - self._base, self._document_peak)
+
+        stage = self.stages.setdefault(
+            name, {"seconds": 0.0, "cpu_seconds": 0.0, "peak_bytes": None, "laps": 0}
+        )
+        stage["seconds"] += seconds
+        stage["cpu_seconds"] += cpu_seconds
+        if peak is not None:
+            stage["peak_bytes"] = max(stage["peak_bytes"] or 0, peak)
+        stage["laps"] += 1
+
+    def add_document(self, file, cached=None, failed=False, **cost):
+        record = {"file": file, "seconds": None, "cpu_seconds": None, "peak_bytes": None,
+                  "pages": None, "images": None, "bytes": None}
+        record.update(cost, cached=cached, failed=failed)
+        self.documents.append(record)
+        if record["peak_bytes"]:
+            self._document_peak = max(self._document_peak, record["peak_bytes"])
+
+    def _stop_profiler(self):
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            _call(profiler, "disable", "stop")
+        return profiler
+
+    def close(self):
+        self._stop_profiler()
+        if self._traced_here:
+            tracemalloc.stop()
+            self._traced_here = False
+
+    # -----------------------------------------
+    # Summaries
+    # -----------------------------------------
+    def totals(self):
+        def total(key):
+            return sum(d[key] or 0 for d in self.documents)
+
+        return {
+            "documents": len(self.documents),
+            "failed": sum(d["failed"] for d in self.documents),
+            "cache_hits": sum(d["cached"] is True for d in self.documents),
+            "cache_misses": sum(d["cached"] is False for d in self.documents),
+            "pages": total("pages"),
+            "images": total("images"),
+            "bytes": total("bytes"),
+            "seconds": sum(s["seconds"] for s in self.stages.values()),
+            "max_rss_bytes": max_rss_bytes(),
+        }
+
+    def slowest(self, n=10):
+        return slowest_documents(self.documents, n)
+
+    def to_dict(self):
+        return {
+            "stages": {name: dict(stage) for name, stage in self.stages.items()},
+            "documents": [dict(d) for d in self.documents],
+            "totals": self.totals(),
+        }
+
+    # -----------------------------------------
+    # Export
+    # -----------------------------------------
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_prometheus(self, labels=None):
+        """Prometheus text exposition format (e.g. for node_exporter's textfile collector)."""
+        return prometheus_text(self.to_dict(), labels)
+
+    def write_prometheus(self, path, labels=None):
+        with open(path, "w") as f:
+            f.write(self.to_prometheus(labels))
+
+    def profile_report(self, stage, sort="cumulative", limit=30):
+        """Top functions of a cProfile'd stage as text."""
+        import io
+        import pstats
+
+        out = io.StringIO()
+        stats = pstats.Stats(*self.profiles[stage], stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def dump_profiles(self, folder):
+        """<stage>.prof per cProfile'd stage (readable by pstats, snakeviz, ...)."""
+        import pstats
+
+        os.makedirs(folder, exist_ok=True)
+        for stage, profilers in self.profiles.items():
+            if all(hasattr(p, "create_stats") for p in profilers):
+                pstats.Stats(*profilers).dump_stats(os.path.join(folder, stage + ".prof"))
+
+
+def slowest_documents(documents, n=10):
+    """The n documents that took longest to extract (cache hits excluded)."""
+    timed = [d for d in documents if d["seconds"] is not None]
+    return sorted(timed, key=lambda d: d["seconds"], reverse=True)[:n]
+
+
+# ============================================================
+#  PROMETHEUS TEXT FORMAT
+# ============================================================
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(metrics, labels=None):
+    """metrics: RunMetrics.to_dict() output; labels: added to every sample."""
+    labels = dict(labels or {})
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        name = f"{PROMETHEUS_PREFIX}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, extra, value in samples:
+            value = value if isinstance(value, int) else repr(float(value))
+            lines.append(f"{name}{suffix}{_labels({**labels, **extra})} {value}")
+
+    stages = metrics["stages"]
+    family("stage_seconds", "gauge", "Wall time of each pipeline stage.",
+           [("", {"stage": s}, v["seconds"]) for s, v in stages.items()])
+    family("stage_cpu_seconds", "gauge", "CPU time of each pipeline stage in the main process.",
+           [("", {"stage": s}, v["cpu_seconds"]) for s, v in stages.items()])
+    peaks = [("", {"stage": s}, v["peak_bytes"]) for s, v in stages.items()
+             if v["peak_bytes"] is not None]
+    if peaks:
+        family("stage_peak_bytes", "gauge", "Peak traced Python memory of each stage.", peaks)
+
+    totals = metrics["totals"]
+    family("documents", "gauge", "PDFs extracted in this run.", [
+        ("", {"status": "parsed"}, totals["documents"] - totals["cache_hits"] - totals["failed"]),
+        ("", {"status": "cached"}, totals["cache_hits"]),
+        ("", {"status": "failed"}, totals["failed"]),
+    ])
+    family("cache_hits", "gauge", "Result cache hits.", [("", {}, totals["cache_hits"])])
+    family("cache_misses", "gauge", "Result cache misses.", [("", {}, totals["cache_misses"])])
+    family("pages", "gauge", "Pages of the parsed PDFs.", [("", {}, totals["pages"])])
+    family("images", "gauge", "Images of the parsed PDFs.", [("", {}, totals["images"])])
+    family("bytes_read", "gauge", "Bytes of the extracted PDFs.", [("", {}, totals["bytes"])])
+    if totals["max_rss_bytes"] is not None:
+        family("max_rss_bytes", "gauge", "Peak resident memory of the process.",
+               [("", {}, totals["max_rss_bytes"])])
+
+    seconds = [d["seconds"] for d in metrics["documents"] if d["seconds"] is not None]
+    buckets = [("_bucket", {"le": f"{b:g}"}, sum(s <= b for s in seconds)) for b in DOCUMENT_BUCKETS]
+    buckets.append(("_bucket", {"le": "+Inf"}, len(seconds)))
+    family("document_seconds", "histogram", "Extraction time per parsed PDF.",
+           buckets + [("_sum", {}, sum(seconds)), ("_count", {}, len(seconds))])
+
+    return "\n".join(lines) + "\n"
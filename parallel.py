@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice
+
+# ============================================================
+#  WORKER COUNT
+# ============================================================
+
+def resolve_workers(workers):
+    """
+    workers: 1 (or None) = serial in-process,
+             0 = one per CPU core,
+             n > 1 = pool of n processes
+    """
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+# ============================================================
+#  CRASH-ISOLATED MAP
+# ============================================================
+
+def _run_pool(fn, entries, workers, results, fallback, on_result=None, max_pending=None):
+    """
+    Runs (i, item) entries until the iterator is exhausted or the pool
+    breaks, with at most max_pending items submitted and unfinished.
+    Returns the entries lost to a broken pool, in input order.
+    """
+    crashed = []
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Nothing new once the pool is broken; the rest gets a fresh one
+            while not crashed and (max_pending is None or len(pending) < max_pending):
+                entry = next(entries, None)
+                if entry is None:
+                    break
+                try:
+                    pending[pool.submit(fn, entry[1])] = entry
+                except BrokenProcessPool:
+                    crashed.append(entry)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: pending[f][0]):
+                i, item = pending.pop(fut)
+                try:
+                    results[i] = fut.result()
+                except BrokenProcessPool:
+                    crashed.append((i, item))
+                    continue
+                except Exception:
+                    results[i] = fallback(item)
+                if on_result:
+                    on_result(i, results[i])
+    return sorted(crashed, key=lambda entry: entry[0])
+
+
+def run_isolated(fn, items, workers=1, fallback=None, on_result=None, max_pending=None):
+    """
+    Applies fn to every item and returns the results in input order.
+    on_result(i, result) is called in this process as each item is done.
+
+    items may be any iterable; it is consumed lazily, holding at most
+    max_pending submitted-but-unfinished items (None = no limit), so
+    a generator of large in-memory items is never read all at once.
+
+    - fn raising → fallback(item) for that item only
+    - a worker process dying (segfault, OOM kill) breaks the pool;
+      the affected items are then retried one per fresh process so
+      only the offending item ends up with fallback(item), and the
+      remaining items continue in a new pool
+    """
+    workers = resolve_workers(workers)
+    fallback = fallback or (lambda item: None)
+    results = {}
+
+    entries = enumerate(items)
+    head = list(islice(entries, 1))
+    entries = chain(head, entries)
+
+    # A single item still goes to a worker: isolation is the point
+    if workers <= 1 or not head:
+        for i, item in entries:
+            try:
+                results[i] = fn(item)
+            except Exception:
+                results[i] = fallback(item)
+            if on_result:
+                on_result(i, results[i])
+        return [results[i] for i in range(len(results))]
+
+    while True:
+        crashed = _run_pool(fn, entries, workers, results, fallback, on_result, max_pending)
+        if not crashed:
+            break
+        for i, item in crashed:
+            retry = {}
+            if _run_pool(fn, iter([(0, item)]), 1, retry, fallback):
+                results[i] = fallback(item)
+            else:
+                results[i] = retry[0]
+            if on_result:
+                on_result(i, results[i])
+
+    return [results[i] for i in range(len(results))]
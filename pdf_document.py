@@ -0,0 +1,200 @@
+import hashlib
+import os
+from io import BytesIO
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+from PIL import Image
+
+# ============================================================
+#  FILTERS WHOSE OUTPUT IS ALREADY AN IMAGE FILE FORMAT
+# ============================================================
+
+ENCODED_IMAGE_FILTERS = {"DCTDecode", "DCT", "JPXDecode"}
+
+RAW_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+
+
+# ============================================================
+#  PARSED DOCUMENT
+# ============================================================
+
+class PDFDocument:
+    """
+    One submission PDF, parsed once.
+
+    Holds everything the evaluation stages need so the file is
+    never re-opened:
+    - pages: [{"text", "words", "image_xobjects"}]
+      ("words" is only filled when the page has no text layout)
+    - images: one record per image placement (encoded bytes + meta)
+
+    Images are stored encoded and only decoded on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.pages = []
+        self.images = []
+
+    def iter_text(self):
+        """Yields one text chunk per page, newline-terminated."""
+        for page in self.pages:
+            if page["words"]:
+                yield " ".join(page["words"]) + "\n"
+            elif page["text"]:
+                yield page["text"] + "\n"
+
+    def text(self):
+        return "".join(self.iter_text())
+
+    def image_count(self):
+        return sum(page["image_xobjects"] for page in self.pages)
+
+    def decoded_images(self):
+        """Yields RGB PIL images; undecodable streams are skipped."""
+        for record in self.images:
+            try:
+                yield decode_image(record)
+            except:
+                pass
+
+
+# ============================================================
+#  IMAGE HELPERS
+# ============================================================
+
+def _filter_names(stream):
+    names = []
+    for f, _ in stream.get_filters():
+        names.append(getattr(f, "name", str(f)))
+    return names
+
+
+def _count_image_xobjects(page):
+    count = 0
+    try:
+        xobj = resolve1(page.page_obj.resources.get("XObject", {}))
+        for name in xobj:
+            try:
+                if getattr(resolve1(xobj[name])["Subtype"], "name", None) == "Image":
+                    count += 1
+            except:
+                pass
+    except:
+        pass
+    return count
+
+
+def _image_record(page_no, img):
+    stream = img["stream"]
+    filters = _filter_names(stream)
+
+    # Plain JPEG/JPX streams are used as stored: no decode, and
+    # pdfminer does not keep a second (decoded) copy around
+    if filters and set(filters) <= ENCODED_IMAGE_FILTERS:
+        data = stream.get_rawdata()
+    else:
+        data = stream.get_data()
+
+    return {
+        "page": page_no,
+        "name": img.get("name"),
+        "data": data,
+        # Identifies bit-identical images, even across XObjects
+        "digest": hashlib.sha1(data).hexdigest(),
+        "encoded": bool(ENCODED_IMAGE_FILTERS & set(filters)),
+        "srcsize": tuple(img.get("srcsize") or (0, 0)),
+        "bits": img.get("bits") or 8,
+    }
+
+
+def _raw_image(record):
+    data = record["data"]
+    w, h = record["srcsize"]
+    if record["bits"] == 1:
+        return Image.frombytes("1", (w, h), data)
+
+    bands = len(data) // (w * h)
+    return Image.frombytes(RAW_MODES[bands], (w, h), data[:w * h * bands])
+
+
+def decode_image(record):
+    if record["encoded"]:
+        return Image.open(BytesIO(record["data"])).convert("RGB")
+    return _raw_image(record).convert("RGB")
+
+
+def decode_thumbnail(record, size=(128, 128)):
+    """
+    Small grayscale decode for hashing. JPEGs use draft mode, so the
+    decoder itself works at 1/2 .. 1/8 scale; everything else is
+    shrunk right after decoding.
+    """
+    if record["encoded"]:
+        im = Image.open(BytesIO(record["data"]))
+        im.draft("L", size)
+    else:
+        im = _raw_image(record)
+
+    im = im.convert("L")
+    im.thumbnail(size)
+    return im
+
+
+# ============================================================
+#  SINGLE-PASS LOADER
+# ============================================================
+
+def load_document(pdf_path, on_image=None, data=None):
+    """
+    on_image: optional callback receiving each image record as it is
+    read. When given, records are handed over instead of kept on the
+    document, so image bytes are released page by page.
+    data: the PDF's bytes when they are already in memory (archive
+    members); pdf_path then only names the document.
+    """
+    doc = PDFDocument(pdf_path)
+    seen = {}    # stream objid -> record (same XObject placed again)
+
+    try:
+        with pdfplumber.open(pdf_path if data is None else BytesIO(data)) as pdf:
+            for page_no, page in enumerate(pdf.pages):
+                entry = {"text": "", "words": [], "image_xobjects": 0}
+
+                try:
+                    entry["text"] = page.extract_text() or ""
+                except:
+                    pass
+
+                # Words only as a fallback, never as a second copy
+                if not entry["text"].strip():
+                    try:
+                        entry["words"] = [w["text"] for w in page.extract_words()]
+                    except:
+                        pass
+
+                entry["image_xobjects"] = _count_image_xobjects(page)
+
+                for img in page.images:
+                    try:
+                        objid = getattr(img["stream"], "objid", None)
+                        if objid is not None and objid in seen:
+                            record = dict(seen[objid], page=page_no, name=img.get("name"))
+                        else:
+                            record = _image_record(page_no, img)
+                            if objid is not None:
+                                seen[objid] = record if on_image is None else dict(record, data=None)
+                    except:
+                        continue
+
+                    if on_image is None:
+                        doc.images.append(record)
+                    else:
+                        on_image(record)
+
+                doc.pages.append(entry)
+    except:
+        pass
+
+    return doc
@@ -1,6 +1,5 @@
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 
 DOMAIN_STOPWORDS = {
     "model","dataset","data","training","train","testing","test","accuracy",
@@ -22,13 +21,89 @@ def long_sentences(text):
 def char_ngrams(text, n=5):
     return {text[i:i+n] for i in range(len(text)-n+1)} if len(text) >= n else set()
 
+def word_ngrams(text, n=3):
+    w = text.split()
+    return {tuple(w[i:i+n]) for i in range(len(w)-n+1)}
+
 def jaccard(a, b):
     if not a or not b:
         return 0
     return len(a & b) / len(a | b)
 
+def shingle_features(texts, analyzer, vocab=None):
+    """
+    Binary CSR matrix (one row per text, one column per shingle) and
+    the {shingle: column} vocabulary, in first-seen order.
+    vocab: existing vocabulary to extend (new shingles are appended).
+    """
+    from collections import defaultdict
+    from scipy.sparse import csr_matrix
+
+    # Unseen shingles get the next column id
+    vocab = defaultdict(None, vocab or {})
+    vocab.default_factory = vocab.__len__
+    indices = []
+    indptr = [0]
+    for t in texts:
+        indices.extend([vocab[s] for s in analyzer(t)])
+        indptr.append(len(indices))
+    vocab = dict(vocab)
+
+    X = csr_matrix(
+        (np.ones(len(indices), dtype=np.float32),
+         np.asarray(indices, dtype=np.int64),
+         np.asarray(indptr, dtype=np.int64)),
+        shape=(len(texts), len(vocab))
+    )
+    X.sort_indices()
+    return X, vocab
+
+def shingle_matrix(texts, analyzer):
+    """Binary CSR matrix: one row per text, one column per shingle."""
+    return shingle_features(texts, analyzer)[0]
+
+def jaccard_upper(shingles):
+    """
+    Pairwise Jaccard of the rows of a binary CSR matrix, for i < j only.
+    |A & B| comes from the sparse product; |A | B| = |A| + |B| - |A & B|.
+    Returns a dense float32 matrix that is zero on and below the diagonal.
+    """
+    from scipy.sparse import triu
+
+    n = shingles.shape[0]
+    out = np.zeros((n, n), dtype=np.float32)
+
+    inter = triu(shingles @ shingles.T, k=1).tocoo()
+    if inter.nnz == 0:
+        return out
+
+    sizes = np.asarray(shingles.getnnz(axis=1), dtype=np.float32)
+    union = sizes[inter.row] + sizes[inter.col] - inter.data
+    out[inter.row, inter.col] = inter.data / union
+    return out
+
+def jaccard_pairs(shingles, I, J, chunk=20000):
+    """Jaccard of the given row pairs only."""
+    sizes = np.asarray(shingles.getnnz(axis=1), dtype=np.float32)
+    out = np.zeros(len(I), dtype=np.float32)
+
+    for s in range(0, len(I), chunk):
+        i, j = I[s:s+chunk], J[s:s+chunk]
+        inter = np.asarray(shingles[i].multiply(shingles[j]).sum(axis=1)).ravel()
+        union = sizes[i] + sizes[j] - inter
+        out[s:s+chunk] = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    return out
+
+def cosine_pairs(tfidf, I, J, chunk=20000):
+    """Cosine of the given row pairs (tf-idf rows are already L2-normalised)."""
+    out = np.zeros(len(I), dtype=np.float32)
+    for s in range(0, len(I), chunk):
+        i, j = I[s:s+chunk], J[s:s+chunk]
+        out[s:s+chunk] = np.asarray(tfidf[i].multiply(tfidf[j]).sum(axis=1)).ravel()
+    return out
+
 # ---------- Core hybrid similarity ----------
-def hybrid_similarity(texts):
+def clean_for_similarity(texts):
     cleaned = []
     index = []
 
@@ -38,55 +113,147 @@ def hybrid_similarity(texts):
             cleaned.append(" ".join(normalize(s) for s in sents))
             index.append(i)
 
+    return cleaned, index
+
+def hybrid_similarity(texts):
+    # sklearn is imported lazily to keep app start-up light
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    cleaned, index = clean_for_similarity(texts)
+
     if len(cleaned) < 2:
         return None, index
 
     tfidf = TfidfVectorizer(min_df=2).fit_transform(cleaned)
-    tfidf_sim = cosine_similarity(tfidf)
+    tfidf_sim = cosine_similarity(tfidf).astype(np.float32)
+
+    # Jaccard on char 5-grams and word 3-grams, upper triangle only
+    char_sim = jaccard_upper(shingle_matrix(cleaned, char_ngrams))
+    phrase_sim = jaccard_upper(shingle_matrix(cleaned, word_ngrams))
+
+    hybrid = np.triu(np.maximum(np.maximum(tfidf_sim, char_sim), phrase_sim), k=1)
+    hybrid = hybrid + hybrid.T
+    np.fill_diagonal(hybrid, 1.0)
+
+    return hybrid, index
 
-    ngram_sets = [char_ngrams(t) for t in cleaned]
+# ---------- LSH candidate mode ----------
+def hybrid_pairs(texts, recall=0.95, lsh_threshold=0.1, num_perm=None):
+    """
+    Sub-quadratic alternative to hybrid_similarity.
 
-    phrase_sets = []
-    for t in cleaned:
-        w = t.split()
-        phrase_sets.append(set(tuple(w[i:i+3]) for i in range(len(w)-2)))
+    MinHash signatures of the word 3-gram sets are banded so that a
+    pair with phrase Jaccard >= lsh_threshold becomes a candidate with
+    probability >= recall; only candidates get the exact
+    max(tfidf, char, phrase) score. Phrases are banded rather than
+    char 5-grams because same-topic reports share many 5-grams but
+    almost no 3-word phrases unless text was copied.
+
+    Returns (scipy COO matrix with i < j entries, index): the same
+    shape of result as hybrid_similarity, but sparse.
+    """
+    from scipy.sparse import coo_matrix
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    import lsh
+
+    cleaned, index = clean_for_similarity(texts)
+
+    if len(cleaned) < 2:
+        return None, index
 
     n = len(cleaned)
-    hybrid = [[0]*n for _ in range(n)]
-
-    for i in range(n):
-        for j in range(n):
-            if i == j:
-                hybrid[i][j] = 1.0
-            else:
-                s1 = tfidf_sim[i][j]
-                s2 = jaccard(ngram_sets[i], ngram_sets[j])
-                s3 = jaccard(phrase_sets[i], phrase_sets[j])
-                hybrid[i][j] = max(s1, s2, s3)
+    num_perm = num_perm or lsh.DEFAULT_NUM_PERM
 
-    return hybrid, index
+    phrase_X, phrase_vocab = shingle_features(cleaned, word_ngrams)
+    signatures = lsh.csr_signatures(
+        phrase_X, lsh.vocabulary_hashes(phrase_vocab), lsh.permutations(num_perm)
+    )
 
-# ---------- Flags ----------
-def plagiarism_flags(theories):
-    hybrid, index = hybrid_similarity(theories)
+    bands, rows = lsh.choose_bands(num_perm, lsh_threshold, recall)
+    I, J = lsh.candidate_pairs([signatures], bands, rows)
 
-    if hybrid is None:
-        return ["LOW"] * len(theories)
+    char_X = shingle_matrix(cleaned, char_ngrams)
+    tfidf = TfidfVectorizer(min_df=2).fit_transform(cleaned).tocsr()
 
-    flags = ["LOW"] * len(theories)
+    scores = np.maximum(
+        np.maximum(cosine_pairs(tfidf, I, J), jaccard_pairs(char_X, I, J)),
+        jaccard_pairs(phrase_X, I, J)
+    )
 
-    for i, orig in enumerate(index):
-        max_sim = max(hybrid[i][j] for j in range(len(hybrid)) if j != i)
+    return coo_matrix((scores, (I, J)), shape=(n, n), dtype=np.float32), index
 
-        if max_sim > 0.65:
-            flags[orig] = "HIGH"
-        elif max_sim > 0.45:
-            flags[orig] = "MEDIUM"
-        else:
-            flags[orig] = "LOW"
+# ---------- Persistent fingerprints ----------
+def text_signatures(texts, num_perm=None, seed=None):
+    """
+    MinHash signatures of the char 5-gram and word 3-gram sets, for
+    the texts hybrid_similarity would compare.
 
-    return flags
+    Returns (index, char_sigs, phrase_sigs); row k belongs to
+    texts[index[k]]. Shingles are hashed stably, so signatures stay
+    comparable across runs with the same num_perm/seed.
+    """
+    import lsh
 
-# ---------- Matrix for reports ----------
-def plagiarism_matrix(theories):
+    cleaned, index = clean_for_similarity(texts)
+    perms = lsh.permutations(num_perm or lsh.DEFAULT_NUM_PERM, seed or lsh.DEFAULT_SEED)
+
+    char_X, char_vocab = shingle_features(cleaned, char_ngrams)
+    phrase_X, phrase_vocab = shingle_features(cleaned, word_ngrams)
+
+    return (
+        index,
+        lsh.csr_signatures(char_X, lsh.vocabulary_hashes(char_vocab), perms),
+        lsh.csr_signatures(phrase_X, lsh.vocabulary_hashes(phrase_vocab), perms),
+    )
+
+def row_max(similarity):
+    """Best match per document, ignoring itself (dense or sparse pairs)."""
+    from scipy.sparse import issparse
+
+    if issparse(similarity):
+        pairs = similarity.tocoo()
+        best = np.zeros(pairs.shape[0], dtype=np.float32)
+        np.maximum.at(best, pairs.row, pairs.data)
+        np.maximum.at(best, pairs.col, pairs.data)
+        return best
+
+    others = np.array(similarity, dtype=np.float32)
+    np.fill_diagonal(others, -np.inf)
+    return others.max(axis=1)
+
+def similarity_for_mode(theories, mode="exact", **lsh_options):
+    if mode == "lsh":
+        return hybrid_pairs(theories, **lsh_options)
+    if mode != "exact":
+        raise ValueError(f"Unknown plagiarism mode: {mode!r}")
     return hybrid_similarity(theories)
+
+# ---------- Flags ----------
+def plagiarism_flags(theories, mode="exact", **lsh_options):
+    hybrid, index = similarity_for_mode(theories, mode, **lsh_options)
+    return flags_from_similarity(hybrid, index, len(theories))
+
+def flags_from_similarity(hybrid, index, n):
+    """LOW / MEDIUM / HIGH per text from a plagiarism_matrix result."""
+    return flags_from_best(best_matches(hybrid, index, n))
+
+def best_matches(hybrid, index, n):
+    """Best similarity per text (float32); NaN for texts not compared."""
+    best = np.full(n, np.nan, dtype=np.float32)
+    if hybrid is not None:
+        best[np.asarray(index, dtype=np.int64)] = row_max(hybrid)
+    return best
+
+def flags_from_best(best, high=0.65, medium=0.45):
+    return np.select(
+        [best > high, best > medium], ["HIGH", "MEDIUM"], "LOW"
+    ).astype(object).tolist()
+
+# ---------- Matrix for reports ----------
+def plagiarism_matrix(theories, mode="exact", **lsh_options):
+    """
+    mode="exact": dense n x n hybrid matrix
+    mode="lsh":   sparse upper-triangle pairs (see hybrid_pairs)
+    """
+    return similarity_for_mode(theories, mode, **lsh_options)
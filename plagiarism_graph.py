@@ -1,8 +1,119 @@
+import json
+import math
+import numpy as np
 import pandas as pd
-from pyvis.network import Network
-import os
 
-def build_graph_html(who_df):
+# Each student keeps its strongest pairs only (an edge survives if
+# it is among the top MAX_EDGES_PER_NODE of either end)
+MAX_EDGES_PER_NODE = 8
+
+# From this cluster size on, positions are computed here and the
+# browser runs no physics at all
+LAYOUT_MIN_NODES = 40
+
+# Larger clusters get a spectral layout (one sparse eigensolve)
+SPRING_MAX_NODES = 500
+
+GRAPH_OPTIONS = """
+{
+  "nodes": {
+    "shape": "dot",
+    "size": 16,
+    "font": { "size": 14 }
+  },
+  "edges": {
+    "font": { "size": 12 },
+    "smooth": true
+  },
+  "physics": {
+    "enabled": true,
+    "barnesHut": {
+      "gravitationalConstant": -3000,
+      "springLength": 120,
+      "springConstant": 0.04
+    },
+    "stabilization": {
+      "enabled": true,
+      "iterations": 300,
+      "fit": true
+    }
+  },
+  "interaction": {
+    "hover": true,
+    "tooltipDelay": 200
+  }
+}
+"""
+
+def prune_edges(who_df, max_edges=MAX_EDGES_PER_NODE):
+    """
+    who_df rows (same order) whose pair is among the max_edges most
+    similar pairs of Student_1 or Student_2. None keeps every row.
+    """
+    if max_edges is None or who_df.empty:
+        return who_df
+
+    sims = pd.to_numeric(who_df["Similarity"]).to_numpy(dtype=float)
+    rows = np.arange(len(who_df))
+    ends = pd.DataFrame({
+        "node": np.concatenate([who_df["Student_1"].to_numpy(), who_df["Student_2"].to_numpy()]),
+        "sim": np.concatenate([sims, sims]),
+        "row": np.concatenate([rows, rows]),
+    }).sort_values(["node", "sim", "row"], ascending=[True, False, True], kind="stable")
+
+    kept = ends.loc[ends.groupby("node", sort=False).cumcount() < max_edges, "row"]
+    return who_df.iloc[np.sort(kept.unique())]
+
+def _edge_rows(who_df):
+    """(a, b, sim, risk) per row; repeated pairs (either direction) keep the first."""
+    risks = who_df["Risk_Level"] if "Risk_Level" in who_df else pd.Series("Suspicious", index=who_df.index)
+    seen = set()
+    for a, b, sim, risk in zip(who_df["Student_1"], who_df["Student_2"],
+                               who_df["Similarity"], risks):
+        key = frozenset((a, b))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield a, b, float(sim), risk
+
+def cluster_layout(nodes, edges, seed=0):
+    """
+    {node: (x, y)} in pixels: each connected component laid out with
+    a spring layout (spectral beyond SPRING_MAX_NODES), components
+    packed left to right in rows.
+    """
+    import networkx as nx
+
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from((a, b, {"weight": sim / 100}) for a, b, sim, _ in edges)
+
+    components = sorted(nx.connected_components(graph), key=len, reverse=True)
+    width = 1800
+    x0 = y0 = row_height = 0
+    positions = {}
+
+    for component in components:
+        # Radius grows with sqrt(size), so node density stays constant
+        radius = 60 * math.sqrt(len(component))
+        if len(component) == 1:
+            local = {next(iter(component)): np.zeros(2)}
+        elif len(component) < SPRING_MAX_NODES:
+            local = nx.spring_layout(graph.subgraph(component), seed=seed)
+        else:
+            # Force-directed layouts take many seconds from here on
+            local = nx.spectral_layout(graph.subgraph(component))
+
+        if x0 and x0 + 2 * radius > width:
+            x0, y0, row_height = 0, y0 + row_height, 0
+        for node, (x, y) in local.items():
+            positions[node] = (x0 + radius * (1 + x), y0 + radius * (1 + y))
+        x0 += 2 * radius + 80
+        row_height = max(row_height, 2 * radius + 80)
+
+    return positions
+
+def build_graph_html(who_df, max_edges=MAX_EDGES_PER_NODE, layout_min_nodes=LAYOUT_MIN_NODES):
     """
     Builds a stable, non-wiggling plagiarism similarity network.
 
@@ -12,8 +123,13 @@ def build_graph_html(who_df):
     - Similarity (percentage, numeric)
     - Risk_Level (Suspicious | High Risk | Near Duplicate)
 
+    max_edges: per-student edge cap (see prune_edges).
+    layout_min_nodes: if a connected component is at least this
+    large, every node gets a precomputed position and physics is off;
+    smaller graphs settle with physics, then freeze.
+
     Returns:
-    - HTML string for Streamlit embedding
+    - HTML string for Streamlit embedding (nothing is written to disk)
     """
 
     # -----------------------------------------
@@ -22,10 +138,31 @@ def build_graph_html(who_df):
     if who_df is None or who_df.empty:
         return None
 
+    # pyvis is imported lazily to keep app start-up light
+    from pyvis.edge import Edge
+    from pyvis.network import Network
+
+    edges = list(_edge_rows(prune_edges(who_df, max_edges)))
+
+    nodes = []
+    for a, b, _, _ in edges:
+        nodes.extend((a, b))
+    nodes = list(dict.fromkeys(nodes))
+
     # -----------------------------------------
-    # Ensure output directory exists (Cloud-safe)
+    # Clusters: big ones are laid out here
     # -----------------------------------------
-    os.makedirs("reports", exist_ok=True)
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    ids = {node: i for i, node in enumerate(nodes)}
+    adjacency = coo_matrix(
+        (np.ones(len(edges)), ([ids[a] for a, *_ in edges], [ids[b] for _, b, *_ in edges])),
+        shape=(len(nodes), len(nodes))
+    )
+    _, labels = connected_components(adjacency, directed=False)
+    largest = np.bincount(labels).max()
+    positions = cluster_layout(nodes, edges) if largest >= layout_min_nodes else None
 
     # -----------------------------------------
     # Create network (undirected similarity)
@@ -38,91 +175,55 @@ def build_graph_html(who_df):
         directed=False
     )
 
-    # -----------------------------------------
-    # Stable physics configuration
-    # -----------------------------------------
-    net.set_options("""
-    {
-      "nodes": {
-        "shape": "dot",
-        "size": 16,
-        "font": { "size": 14 }
-      },
-      "edges": {
-        "font": { "size": 12 },
-        "smooth": true
-      },
-      "physics": {
-        "enabled": true,
-        "barnesHut": {
-          "gravitationalConstant": -3000,
-          "springLength": 120,
-          "springConstant": 0.04
-        },
-        "stabilization": {
-          "enabled": true,
-          "iterations": 300,
-          "fit": true
-        }
-      },
-      "interaction": {
-        "hover": true,
-        "tooltipDelay": 200
-      }
-    }
-    """)
+    options = json.loads(GRAPH_OPTIONS)
+    if positions is not None:
+        options["physics"] = {"enabled": False}
+        options["edges"]["smooth"] = False
+    net.set_options(json.dumps(options, indent=2) if positions is not None else GRAPH_OPTIONS)
 
     # -----------------------------------------
     # Add nodes & edges (NEW schema)
     # -----------------------------------------
-    for _, row in who_df.iterrows():
-        a = row["Student_1"]
-        b = row["Student_2"]
-        sim = float(row["Similarity"])
-        risk = row.get("Risk_Level", "Suspicious")
-
+    for node in nodes:
+        if positions is None:
+            net.add_node(node, label=node)
+        else:
+            x, y = positions[node]
+            net.add_node(node, label=node, x=round(x, 1), y=round(y, 1),
+                         group=int(labels[ids[node]]), physics=False)
+
+    # Edges are appended directly: pyvis' add_edge rescans every edge
+    # for duplicates, which is quadratic (_edge_rows already dedupes)
+    for a, b, sim, risk in edges:
         # Edge color by risk
         edge_color = (
             "#dc2626" if risk == "Near Duplicate" else
             "#f59e0b" if risk == "High Risk" else
             "#2563eb"
         )
-
-        net.add_node(a, label=a)
-        net.add_node(b, label=b)
-
-        net.add_edge(
+        net.edges.append(Edge(
             a,
             b,
             value=sim,
             title=f"{risk} – {sim}%",
             color=edge_color
-        )
+        ).options)
 
-    # -----------------------------------------
-    # Write HTML
-    # -----------------------------------------
-    output_path = "reports/plagiarism_network.html"
-    net.write_html(output_path, notebook=False)
+    html = net.generate_html(notebook=False)
 
     # -----------------------------------------
     # HARD FREEZE (pyvis-version agnostic)
     # Disable physics AFTER stabilization
     # -----------------------------------------
-    with open(output_path, "r", encoding="utf-8") as f:
-        html = f.read()
-
-    html = html.replace(
-        "network = new vis.Network(container, data, options);",
-        """
+    if positions is None:
+        html = html.replace(
+            "network = new vis.Network(container, data, options);",
+            """
         network = new vis.Network(container, data, options);
         network.once("stabilizationIterationsDone", function () {
             network.setOptions({ physics: false });
         });
         """
-    )
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+        )
 
     return html
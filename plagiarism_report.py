@@ -1,42 +1,176 @@
+import numpy as np
 import pandas as pd
 
-def build_reports(names, similarity_matrix, threshold=0.45):
+PAIRWISE_MODES = ("full", "top_k", "threshold")
+
+def _at_least(threshold):
+    """Smallest float32 x with float64(x) >= threshold, for exact float32 masks."""
+    t = np.float32(threshold)
+    if float(t) < threshold:
+        t = np.nextafter(t, np.float32(np.inf))
+    return t
+
+def pair_arrays(similarity_matrix, n, min_sim=None, chunk=1024):
+    """
+    (I, J, sims) of the pairs i < j in row-major order, sims as
+    float64. Dense matrices give every pair, sparse ones (LSH mode)
+    the scored pairs only. min_sim keeps pairs with sim >= min_sim;
+    dense matrices are masked in row blocks of chunk rows, so no
+    n x n temporary is built.
+    """
+    if hasattr(similarity_matrix, "tocoo"):
+        pairs = similarity_matrix.tocoo()
+        I, J = pairs.row.astype(np.int64), pairs.col.astype(np.int64)
+        S = pairs.data.astype(np.float64)
+        keep = I < J
+        if min_sim is not None:
+            keep &= S >= min_sim
+        I, J, S = I[keep], J[keep], S[keep]
+        order = np.lexsort((J, I))
+        return I[order], J[order], S[order]
+
+    matrix = np.asarray(similarity_matrix)
+    if min_sim is not None and matrix.dtype == np.float32:
+        bound = _at_least(min_sim)
+    else:
+        bound = min_sim
+
+    cols = np.arange(n)
+    Is, Js, Ss = [], [], []
+    for start in range(0, n, chunk):
+        block = matrix[start:start + chunk, :n]
+        rows = np.arange(start, start + block.shape[0])
+        mask = cols[None, :] > rows[:, None]
+        if bound is not None:
+            mask &= block >= bound
+        r, c = np.nonzero(mask)
+        Is.append(rows[r])
+        Js.append(c)
+        Ss.append(block[r, c].astype(np.float64))
+
+    if not Is:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    return np.concatenate(Is), np.concatenate(Js), np.concatenate(Ss)
+
+def top_k_arrays(similarity_matrix, n, k, chunk=1024):
+    """
+    Like pair_arrays, but only pairs among the k most similar other
+    students of either side.
+    """
+    if hasattr(similarity_matrix, "tocoo"):
+        I, J, S = pair_arrays(similarity_matrix, n)
+        m = len(I)
+        owners = np.concatenate([I, J])
+        others = np.concatenate([J, I])
+        sims = np.concatenate([S, S])
+        order = np.lexsort((others, -sims, owners))
+        # Rank of each pair within its owner's list, best first
+        grouped = owners[order]
+        first = np.searchsorted(grouped, grouped)
+        rank = np.arange(len(order)) - first
+        chosen = np.unique(order[rank < k] % m) if m else order
+        return I[chosen], J[chosen], S[chosen]
+
+    matrix = np.asarray(similarity_matrix)
+    k = min(k, n - 1)
+    if k <= 0:
+        return pair_arrays(matrix, 0)
+
+    codes = []
+    for start in range(0, n, chunk):
+        block = matrix[start:start + chunk, :n].astype(np.float64)
+        rows = np.arange(start, start + block.shape[0])
+        block[np.arange(len(rows)), rows] = -np.inf
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        a = np.minimum(rows[:, None], top).ravel()
+        b = np.maximum(rows[:, None], top).ravel()
+        codes.append(a * n + b)
+
+    codes = np.unique(np.concatenate(codes))
+    I, J = codes // n, codes % n
+    return I, J, matrix[I, J].astype(np.float64)
+
+def _round_percent(sims):
+    """round(sim * 100, 1) with Python's exact decimal rounding."""
+    x = sims * 100
+    out = np.round(x, 1)
+    # np.round goes through x * 10 in binary, so it can only disagree
+    # with round() next to a .x5 tie; those few are redone in Python
+    scaled = x * 10
+    near = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    out[near] = [round(v, 1) for v in x[near].tolist()]
+    return out
+
+def risk_level(sim):
+    return (
+        "Near Duplicate" if sim >= 0.90 else
+        "High Risk" if sim >= 0.75 else
+        "Suspicious"
+    )
+
+def risk_levels(sims):
+    """risk_level of every value of a float64 array."""
+    return np.select(
+        [sims >= 0.90, sims >= 0.75], ["Near Duplicate", "High Risk"], "Suspicious"
+    ).astype(object)
+
+def build_reports(names, similarity_matrix, threshold=0.45, mode="full", top_k=5):
+    """
+    (pairwise, who) DataFrames of unique pairs (i < j).
+
+    who: pairs with similarity >= threshold, with their risk level.
+    pairwise, by mode:
+      "full"       every pair (n(n-1)/2 rows for dense matrices)
+      "top_k"      each student's top_k most similar others
+      "threshold"  the pairs in who
+    Sparse (LSH) matrices only yield the pairs that were scored.
+    """
+    if mode not in PAIRWISE_MODES:
+        raise ValueError(f"Unknown pairwise mode: {mode!r} (expected one of {PAIRWISE_MODES})")
+
     n = len(names)
+    names = np.asarray(names, dtype=object)
 
     # ------------------------------------
-    # 1. Pairwise similarity (UNIQUE pairs)
+    # 1. Suspicious pairs (UNIQUE)
     # ------------------------------------
-    rows = []
-    for i in range(n):
-        for j in range(i + 1, n):   # ✅ unique pairs only
-            rows.append({
-                "Student_A": names[i],
-                "Student_B": names[j],
-                "Similarity": round(float(similarity_matrix[i][j]) * 100, 1)
-            })
-
-    pairwise = pd.DataFrame(rows)
+    I, J, S = pair_arrays(similarity_matrix, n, min_sim=threshold)
+    who = pd.DataFrame({
+        "Student_1": names[I],
+        "Student_2": names[J],
+        "Similarity": _round_percent(S),
+        "Risk_Level": risk_levels(S),
+    })
 
     # ------------------------------------
-    # 2. Suspicious pairs (UNIQUE)
+    # 2. Pairwise similarity (UNIQUE pairs)
     # ------------------------------------
-    suspects = []
-    for i in range(n):
-        for j in range(i + 1, n):   # ✅ unique pairs only
-            sim = float(similarity_matrix[i][j])
-
-            if sim >= threshold:
-                suspects.append({
-                    "Student_1": names[i],
-                    "Student_2": names[j],
-                    "Similarity": round(sim * 100, 1),
-                    "Risk_Level": (
-                        "Near Duplicate" if sim >= 0.90 else
-                        "High Risk" if sim >= 0.75 else
-                        "Suspicious"
-                    )
-                })
-
-    who = pd.DataFrame(suspects)
+    if mode == "full":
+        I, J, S = pair_arrays(similarity_matrix, n)
+    elif mode == "top_k":
+        I, J, S = top_k_arrays(similarity_matrix, n, top_k)
+
+    pairwise = pd.DataFrame({
+        "Student_A": names[I],
+        "Student_B": names[J],
+        "Similarity": _round_percent(S),
+    })
 
     return pairwise, who
+
+def matched_with(files, who):
+    """
+    "<Risk_Level> (<Similarity>%)" of each file's last pair in who
+    (a file can be Student_1 or Student_2), "" when it has none.
+    files: Series of file names; the result has the same index.
+    """
+    if who is None or who.empty:
+        return pd.Series("", index=files.index, dtype=str)
+
+    labels = who["Risk_Level"].astype(str) + " (" + who["Similarity"].astype(str) + "%)"
+    # Row order a0, b0, a1, b1, ...: the last mention of a file wins
+    names = who[["Student_1", "Student_2"]].to_numpy().ravel()
+    by_file = pd.Series(labels.to_numpy().repeat(2), index=names)
+    by_file = by_file[~by_file.index.duplicated(keep="last")]
+    return files.map(by_file).fillna("").astype(str)
@@ -0,0 +1,37 @@
+import time
+
+# ============================================================
+#  STAGE TIMING
+# ============================================================
+
+class StageClock:
+    """
+    Wall and CPU time per pipeline stage. lap(name) closes the stage
+    that started at the previous lap (or at construction).
+
+    progress: optional progress(event, **info) callback, sent
+    ("stage", name=, seconds=, cpu_seconds=) after every lap.
+    metrics: optional metrics.RunMetrics, told where every stage
+    starts and ends (peak memory, profiler hook).
+    """
+
+    def __init__(self, progress=None, metrics=None):
+        self.progress = progress
+        self.metrics = metrics
+        self.timings = {}
+        self._last = time.perf_counter()
+        self._cpu = time.process_time()
+        if metrics is not None:
+            metrics.start_stage()
+
+    def lap(self, name):
+        now, cpu = time.perf_counter(), time.process_time()
+        seconds, cpu_seconds = now - self._last, cpu - self._cpu
+        self._last, self._cpu = now, cpu
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        if self.metrics is not None:
+            self.metrics.end_stage(name, seconds, cpu_seconds)
+            self.metrics.start_stage()
+        if self.progress:
+            self.progress("stage", name=name, seconds=seconds, cpu_seconds=cpu_seconds)
+        return seconds
@@ -0,0 +1,155 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from marks import make_rubric, score_marks
+from plagiarism import flags_from_best
+from plagiarism_graph import build_graph_html
+from plagiarism_report import build_reports
+from progress import StageClock
+
+# ============================================================
+#  TUNABLE THRESHOLDS
+# ============================================================
+
+DEFAULT_THRESHOLDS = {
+    "flag_high": 0.65,          # best match above → Plagiarism HIGH
+    "flag_medium": 0.45,        # best match above → Plagiarism MEDIUM
+    "report": 0.45,             # pairs at or above → who_df / graph
+    "theory_band": (200, 300),  # see marks.make_rubric
+    "caps": ((0.7, 65), (0.4, 80)),
+    "bands": ((85, 5), (70, 4), (55, 3), (40, 2)),
+    "pairwise": "full",         # pairwise_df rows: see build_reports(mode=)
+    "top_k": 5,                 # neighbours per student in "top_k" mode
+}
+
+WHO_COLUMNS = ["Student_1", "Student_2", "Similarity", "Risk_Level"]
+
+
+def resolve_thresholds(thresholds=None):
+    return dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+
+
+# ============================================================
+#  STORED FEATURES OF A RUN
+# ============================================================
+
+class EvaluationFeatures:
+    """
+    Everything of a run that does not depend on thresholds: the
+    per-document table (sections, word counts, screenshot findings,
+    relevance scores), each document's best batch and archive match,
+    and the report similarity matrix. score_features() turns it into
+    run_evaluation's outputs without touching any PDF.
+    """
+
+    metrics = None    # features saved before metrics were kept
+
+    def __init__(self, df, flag_best, report_names, report_matrix,
+                 archive_best=None, archive_rows=None, metrics=None):
+        self.df = df                          # one row per PDF, no Theory_Text
+        self.flag_best = flag_best            # float32, NaN = not compared
+        self.report_names = report_names      # rows/columns of report_matrix
+        self.report_matrix = report_matrix    # dense, sparse (LSH) or None
+        self.archive_best = archive_best      # None when no archive was used
+        self.archive_rows = archive_rows or []
+        self.metrics = metrics                # RunMetrics.to_dict() of the extraction, or None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+# ============================================================
+#  THRESHOLD-DEPENDENT SCORING
+# ============================================================
+
+def score_features(features, thresholds=None, progress=None, metrics=None):
+    """
+    (df_final, pairwise_df, who_df, graph_html) from stored features.
+    thresholds: overrides of DEFAULT_THRESHOLDS.
+    metrics: optional metrics.RunMetrics, gets the scoring stages.
+    """
+    t = resolve_thresholds(thresholds)
+    clock = StageClock(progress, metrics)
+    df = features.df.copy()
+
+    # -------------------------------------------------
+    # Flags: batch match, then archive escalation
+    # -------------------------------------------------
+    df.insert(
+        df.columns.get_loc("Screenshot_Status"), "Plagiarism",
+        flags_from_best(features.flag_best, t["flag_high"], t["flag_medium"])
+    )
+
+    if features.archive_best is not None:
+        best = features.archive_best
+        df.loc[best > t["flag_high"], "Plagiarism"] = "HIGH"
+        df.loc[(best > t["flag_medium"]) & (df["Plagiarism"] != "HIGH"), "Plagiarism"] = "MEDIUM"
+
+    # -------------------------------------------------
+    # 🔒 INTEGRITY NORMALIZATION (NO DOUBLE PENALTY)
+    # -------------------------------------------------
+    df.loc[df["Screenshot_Plagiarism"].str.strip() != "", "Plagiarism"] = "HIGH"
+
+    df["Integrity_Remark"] = ""
+    df.loc[df["Plagiarism"] == "MEDIUM", "Integrity_Remark"] = \
+        "Suspicious similarity detected"
+    df.loc[df["Plagiarism"] == "HIGH", "Integrity_Remark"] = \
+        "High similarity – likely copied"
+
+    # -------------------------------------------------
+    # 🎯 MARK COMPUTATION (DELEGATED TO marks.py)
+    # -------------------------------------------------
+    rubric = make_rubric(t["theory_band"], t["caps"], t["bands"])
+    df = pd.concat([df, score_marks(df, rubric)], axis=1)
+    clock.lap("marks")
+
+    # -------------------------------------------------
+    # Reports + graph
+    # -------------------------------------------------
+    pairwise_df = None
+    who_df = None
+    graph_html = None
+
+    if features.report_matrix is not None and len(features.report_names) > 1:
+        pairwise_df, who_df = build_reports(
+            features.report_names, features.report_matrix, t["report"],
+            mode=t["pairwise"], top_k=t["top_k"]
+        )
+
+    if features.archive_best is not None:
+        if who_df is None or who_df.columns.empty:
+            who_df = pd.DataFrame(columns=WHO_COLUMNS)
+        archive_rows = [
+            r for r in features.archive_rows if r["Similarity"] / 100 >= t["report"]
+        ]
+        who_df = pd.concat([
+            who_df.assign(Source="Batch"),
+            pd.DataFrame(archive_rows, columns=WHO_COLUMNS).assign(Source="Archive")
+        ], ignore_index=True)
+
+    clock.lap("reports")
+
+    if who_df is not None and len(who_df):
+        graph_html = build_graph_html(who_df)
+    clock.lap("graph")
+
+    return df, pairwise_df, who_df, graph_html
+
+
+def archive_best_matches(names, archive_rows):
+    """Best archive similarity (0–1) per file name; NaN when unmatched."""
+    best = {}
+    for r in archive_rows:
+        best[r["Student_1"]] = max(best.get(r["Student_1"], 0), r["Similarity"] / 100)
+    return np.array([best.get(name, np.nan) for name in names], dtype=float)
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+import evaluator
+
+# ============================================================
+#  CACHE KEY
+# ============================================================
+
+# Bump whenever extraction / hashing code changes its output.
+# SECTION_ALIASES edits are picked up automatically (see below).
+#   2: screenshot phashes from thumbnail decodes
+#   3: page words only as a fallback for pages without text
+EXTRACTOR_VERSION = "3"
+
+# Bump whenever run_all / marks / reports change a whole-run result
+RESULTS_VERSION = "4"
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "extraction.sqlite")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_EVALUATION_PATH = os.path.join("cache", "evaluations.sqlite")
+DEFAULT_EVALUATION_MAX_BYTES = 512 * 1024 * 1024
+
+
+def extractor_version():
+    aliases = json.dumps(evaluator.SECTION_ALIASES, sort_keys=True)
+    return EXTRACTOR_VERSION + "-" + hashlib.sha256(aliases.encode("utf-8")).hexdigest()[:12]
+
+
+def evaluation_version(**options):
+    """Everything besides the files and topic that shapes a run_evaluation result."""
+    from semantic import MODEL_NAME
+
+    config = {"results": RESULTS_VERSION, "extractor": extractor_version(),
+              "model": MODEL_NAME, "options": options}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def evaluation_key(files, topic, version):
+    """files: [(name, sha256)]; names matter, they appear in the reports."""
+    payload = json.dumps({"files": sorted(files), "topic": topic, "version": version})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ============================================================
+#  PERSISTENT PER-PDF RESULT CACHE
+# ============================================================
+
+class ResultCache:
+    """
+    On-disk cache of extraction.process_pdf outputs
+    (evaluator record + screenshot phashes).
+
+    Keyed by SHA-256 of the PDF bytes and extractor_version(),
+    so renamed copies hit and alias/code changes miss.
+    Least-recently-used rows are evicted beyond max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = extractor_version()
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    sha256    TEXT NOT NULL,
+                    version   TEXT NOT NULL,
+                    payload   TEXT NOT NULL,
+                    size      INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (sha256, version)
+                )
+            """)
+        self.invalidate_stale()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # -----------------------------------------
+    # Lookup / store
+    # -----------------------------------------
+    def get(self, digest, pdf_path):
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT payload FROM results WHERE sha256 = ? AND version = ?",
+                (digest, self.version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            con.execute(
+                "UPDATE results SET last_used = ? WHERE sha256 = ? AND version = ?",
+                (time.time(), digest, self.version)
+            )
+
+        self.hits += 1
+        record, screens = json.loads(row[0])
+
+        # Content is shared; the name belongs to this upload
+        filename = os.path.basename(pdf_path)
+        record["File"] = filename
+        record["Filename_OK"] = evaluator.filename_ok(filename)
+        return record, screens
+
+    def put(self, digest, result):
+        payload = json.dumps(result)
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (digest, self.version, payload, len(payload), time.time())
+            )
+        self.evict()
+
+    # -----------------------------------------
+    # Eviction / invalidation
+    # -----------------------------------------
+    def evict(self):
+        with self._connect() as con:
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            rows = con.execute(
+                "SELECT sha256, version, size FROM results ORDER BY last_used"
+            ).fetchall()
+            for digest, version, size in rows:
+                if total <= self.max_bytes:
+                    break
+                con.execute(
+                    "DELETE FROM results WHERE sha256 = ? AND version = ?",
+                    (digest, version)
+                )
+                total -= size
+
+    def invalidate_stale(self):
+        # Rows written under an older extractor / SECTION_ALIASES
+        with self._connect() as con:
+            con.execute("DELETE FROM results WHERE version != ?", (self.version,))
+
+    def clear(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM results")
+
+
+# ============================================================
+#  PERSISTENT WHOLE-RUN RESULT CACHE
+# ============================================================
+
+class EvaluationCache:
+    """
+    On-disk cache of complete runs as rescore.EvaluationFeatures
+    (scored on load, so thresholds stay adjustable), keyed by
+    evaluation_key().
+    Least-recently-used rows are evicted beyond max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_EVALUATION_PATH, max_bytes=DEFAULT_EVALUATION_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS evaluations (
+                    key       TEXT PRIMARY KEY,
+                    payload   BLOB NOT NULL,
+                    size      INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT payload FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            con.execute(
+                "UPDATE evaluations SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key, result):
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time())
+            )
+        self.evict()
+
+    def evict(self):
+        with self._connect() as con:
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM evaluations").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            rows = con.execute(
+                "SELECT key, size FROM evaluations ORDER BY last_used"
+            ).fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                con.execute("DELETE FROM evaluations WHERE key = ?", (key,))
+                total -= size
+
+    def clear(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM evaluations")
@@ -1,24 +1,119 @@
-import os
+import time
+import numpy as np
 import pandas as pd
-import evaluator
 import plagiarism
-from plagiarism_report import build_reports
 from plagiarism import plagiarism_matrix
-from screenshot_check import analyze_screenshots
-from semantic import evaluate_sections
-from plagiarism_graph import build_graph_html
-from marks import compute_marks   # ✅ NEW: single source of truth
+from boilerplate import DEFAULT_MIN_SHARE, clean_cohort
+from extraction import extract_all
+from fingerprint_store import PHASH_CHUNKS
+from result_cache import file_sha256
+from screenshot_check import find_duplicates, screenshot_columns
+from semantic import SECTION_COLUMNS, evaluate_sections_batch
+from sources import MemberReader, submission_pdfs
+from progress import StageClock
+from rescore import EvaluationFeatures, archive_best_matches, score_features
 
 # -------------------------------------------------
 # MAIN CLOUD SAFE FUNCTION
 # -------------------------------------------------
 
-def run_evaluation(submission_folder, topic):
+def run_evaluation(submission_folder, topic, workers=1, cache=None,
+                   plagiarism_mode="exact", screenshot_distance=0,
+                   archive=None, archive_cohort=None, state=None, progress=None,
+                   thresholds=None, boilerplate_share=DEFAULT_MIN_SHARE, metrics=None):
+    """
+    Returns (df_final, pairwise_df, who_df, graph_html).
+    Arguments as extract_features (submission_folder may also be a
+    ZIP/tar file or (name, data) pairs); thresholds: overrides of
+    rescore.DEFAULT_THRESHOLDS. Same as score_features(extract_features(...));
+    keep the features to re-score without re-running anything.
+    """
+    features = extract_features(
+        submission_folder, topic, workers, cache, plagiarism_mode,
+        screenshot_distance, archive, archive_cohort, state, progress,
+        boilerplate_share, metrics
+    )
+    return score_features(features, thresholds, progress, metrics)
+
+
+def extract_features(submission_folder, topic, workers=1, cache=None,
+                     plagiarism_mode="exact", screenshot_distance=0,
+                     archive=None, archive_cohort=None, state=None, progress=None,
+                     boilerplate_share=DEFAULT_MIN_SHARE, metrics=None):
+    """
+    Every threshold-independent stage of an evaluation (parsing,
+    hashing, embeddings, similarity); returns rescore.EvaluationFeatures.
+
+    submission_folder: a folder of PDFs, a ZIP or tar file (path or
+    binary file object), or an iterable of (name, data) pairs with
+    data as bytes or a binary stream. Archive members and streams
+    are never written to disk: each is read once into memory (and
+    hashed during that read), handed to the extraction pool and
+    dropped once parsed; only a few per worker are held at a time.
+    Only the file name of a member counts (see sources.MemberReader).
+    workers: 1 = serial, 0 = one process per CPU core, n = pool of n.
+    Per-PDF work fans out over the pool; cross-document stages
+    (plagiarism, screenshot duplicates) run once all files are back.
+    cache: optional result_cache.ResultCache for per-PDF results.
+    plagiarism_mode: "exact" (all pairs) or "lsh" (MinHash candidates,
+    sub-quadratic; pairwise report then lists scored pairs only).
+    screenshot_distance: phash bits two screenshots may differ by and
+    still count as copied (0 = exact match only; below PHASH_CHUNKS
+    with an archive).
+    archive: optional fingerprint_store.FingerprintStore. The batch is
+    checked against every previously archived submission but its own
+    files, then archived itself under archive_cohort (a label, default:
+    today's date).
+    state: optional incremental.EvaluationState from an earlier run.
+    Only added or replaced files are extracted, scored and compared
+    (new similarity rows/columns, new screenshot hashes); the output
+    is identical to a full run. The state is updated in place.
+    progress: optional progress(event, **info) callback; receives
+    ("file", done=, total=, name=) per extracted PDF and
+    ("stage", name=, seconds=) as each stage ends.
+    boilerplate_share: lines and word n-grams found in more than this
+    share of the batch count as template text and are stripped before
+    the report matrix (see boilerplate.find_boilerplate); None strips
+    the static institution list only.
+    metrics: optional metrics.RunMetrics collecting per-stage and
+    per-document costs; a snapshot is kept as features.metrics.
+    """
+    if archive is not None and screenshot_distance >= PHASH_CHUNKS:
+        # Checked before any PDF is parsed, not after
+        raise ValueError(
+            f"screenshot_distance must be < {PHASH_CHUNKS} with an archive "
+            f"(got {screenshot_distance})"
+        )
+    clock = StageClock(progress, metrics)
 
-    records = []
-    for f in os.listdir(submission_folder):
-        if f.lower().endswith(".pdf"):
-            records.append(evaluator.evaluate(os.path.join(submission_folder, f)))
+    # -------------------------------------------------
+    # Per-PDF stage: parse once, feed every stage
+    # -------------------------------------------------
+    pdfs = submission_pdfs(submission_folder)
+    streamed = isinstance(pdfs, MemberReader)
+
+    if state is not None:
+        records, screen_report, digests, changed = state.extract(
+            pdfs, workers, cache, progress, metrics
+        )
+        pdf_paths = pdfs.names if streamed else pdfs
+    else:
+        records = []
+        screen_report = {}
+        results = extract_all(pdfs, workers, cache, progress, metrics)
+        pdf_paths = pdfs.names if streamed else pdfs
+        for path, (record, screens) in zip(pdf_paths, results):
+            records.append(record)
+            screen_report[path] = screens
+        digests = pdfs.sha256s if streamed else None
+
+    if streamed:
+        # Members come in archive order; rows are sorted like a folder's
+        order = sorted(range(len(pdf_paths)), key=pdf_paths.__getitem__)
+        pdf_paths = [pdf_paths[i] for i in order]
+        records = [records[i] for i in order]
+        digests = [digests[i] for i in order]
+    clock.lap("extraction")
 
     df = pd.DataFrame(records)
 
@@ -42,98 +137,87 @@ def run_evaluation(submission_folder, topic):
     # -------------------------------------------------
     # Plagiarism flags (text-level)
     # -------------------------------------------------
-    df["Plagiarism"] = plagiarism.plagiarism_flags(
-        df["Theory_Text"].fillna("").tolist()
-    )
+    theory_texts = df["Theory_Text"].fillna("").tolist()
+    if state is not None and plagiarism_mode == "exact":
+        hybrid, index = state.flag_similarity.similarity(pdf_paths, theory_texts)
+    else:
+        hybrid, index = plagiarism.similarity_for_mode(theory_texts, plagiarism_mode)
+    flag_best = plagiarism.best_matches(hybrid, index, len(theory_texts))
+    clock.lap("plagiarism_flags")
 
     # -------------------------------------------------
     # Screenshot forensics
     # -------------------------------------------------
-    pdf_paths = [os.path.join(submission_folder, f) for f in df["File"].tolist()]
-    screen_report, duplicates = analyze_screenshots(pdf_paths)
-
-    df["Screenshot_Status"] = "OK"
-    df["Screenshot_Plagiarism"] = ""
-
-    for i, row in df.iterrows():
-        path = os.path.join(submission_folder, row["File"])
-        status = screen_report.get(path, {}).get("status", "NONE")
-        df.at[i, "Screenshot_Status"] = status
-
-        if path in duplicates:
-            df.at[i, "Screenshot_Plagiarism"] = ", ".join(
-                [os.path.basename(x) for x in duplicates[path]]
-            )
+    if state is not None:
+        duplicates = state.find_duplicates(screen_report, changed, screenshot_distance)
+    else:
+        duplicates = find_duplicates(screen_report, screenshot_distance)
+    clock.lap("screenshots")
 
     # -------------------------------------------------
-    # Semantic understanding
+    # Historical check against archived cohorts
     # -------------------------------------------------
-    for sec in [
-        "Theory_Relevance",
-        "Algorithm_Relevance",
-        "Analysis_Relevance",
-        "Conclusion_Relevance"
-    ]:
-        df[sec] = 0.0
-
-    for i, row in df.iterrows():
-        scores = evaluate_sections(
-            topic,
-            row.get("Theory_Text",""),
-            row.get("Theory_Text",""),
-            row.get("Theory_Text",""),
-            row.get("Theory_Text","")
-        )
-        for k, v in scores.items():
-            df.at[i, k] = round(v, 3)
+    archive_rows = []
+    archive_best = None
+    if archive is not None:
+        if state is not None:
+            archive_rows, archive_screens = state.check_archive(
+                archive, archive_cohort, pdf_paths, df["File"].tolist(), digests,
+                theory_texts, screen_report, max_distance=screenshot_distance
+            )
+        else:
+            archive_rows, archive_screens = archive.check_and_add(
+                archive_cohort or time.strftime("%Y-%m-%d"),
+                df["File"].tolist(),
+                digests or [file_sha256(p) for p in pdf_paths],
+                theory_texts,
+                [screen_report[p]["hashes"] for p in pdf_paths],
+                max_distance=screenshot_distance
+            )
 
-    # -------------------------------------------------
-    # 🔒 INTEGRITY NORMALIZATION (NO DOUBLE PENALTY)
-    # -------------------------------------------------
-    df.loc[df["Screenshot_Plagiarism"].str.strip() != "", "Plagiarism"] = "HIGH"
+        for path, labels in zip(pdf_paths, archive_screens):
+            if labels:
+                duplicates[path] = set(duplicates.get(path, ())) | labels
 
-    df["Integrity_Remark"] = ""
-    df.loc[df["Plagiarism"] == "MEDIUM", "Integrity_Remark"] = \
-        "Suspicious similarity detected"
-    df.loc[df["Plagiarism"] == "HIGH", "Integrity_Remark"] = \
-        "High similarity – likely copied"
+        archive_best = archive_best_matches(df["File"].tolist(), archive_rows)
+        clock.lap("archive")
+
+    df["Screenshot_Status"], df["Screenshot_Plagiarism"] = screenshot_columns(
+        df["File"], screen_report, duplicates
+    )
 
     # -------------------------------------------------
-    # 🎯 MARK COMPUTATION (DELEGATED TO marks.py)
+    # Semantic understanding
     # -------------------------------------------------
-    mark_rows = df.apply(compute_marks, axis=1, result_type="expand")
-    df = pd.concat([df, mark_rows], axis=1)
+    # Only the theory text is segmented today, so it stands in for
+    # every section; embed() encodes each distinct text once.
+    if state is not None:
+        relevance = state.relevance_scores(topic, pdf_paths, digests, theory_texts)
+    else:
+        relevance = evaluate_sections_batch(
+            topic, {sec: theory_texts for sec in SECTION_COLUMNS}
+        )
+    for sec, scores in relevance.items():
+        df[sec] = np.round(scores.astype(float), 3)
+    clock.lap("semantic")
 
     # -------------------------------------------------
     # BOILERPLATE-STRIPPED PLAGIARISM MATRIX
     # -------------------------------------------------
-    cleaned_texts = []
-    for t in df["Theory_Text"].fillna(""):
-        t = t.lower()
-        for junk in [
-            "ramdeobaba", "rcoem", "experiment", "aim", "objective",
-            "department", "computer science", "data science",
-            "university", "semester", "roll no", "name:", "date:"
-        ]:
-            t = t.replace(junk, "")
-        t = "".join([c for c in t if not c.isdigit()])
-        t = " ".join(t.split())
-        cleaned_texts.append(t)
-
-    sim_matrix, index_map = plagiarism_matrix(cleaned_texts)
-
-    pairwise_df = None
-    who_df = None
-    graph_html = None
+    cleaned_texts, _ = clean_cohort(theory_texts, boilerplate_share)
+    clock.lap("boilerplate")
 
-    if sim_matrix is not None and len(index_map) > 1:
-        names = df.iloc[index_map]["File"].tolist()
-        pairwise_df, who_df = build_reports(names, sim_matrix)
-        graph_html = build_graph_html(who_df)
+    if state is not None and plagiarism_mode == "exact":
+        sim_matrix, index_map = state.report_similarity.similarity(pdf_paths, cleaned_texts)
+    else:
+        sim_matrix, index_map = plagiarism_matrix(cleaned_texts, mode=plagiarism_mode)
+    clock.lap("plagiarism_matrix")
 
-    # -------------------------------------------------
-    # FINAL OUTPUT (UI SAFE)
-    # -------------------------------------------------
-    df_final = df.drop(columns=["Theory_Text"])
+    report_names = []
+    if sim_matrix is not None:
+        report_names = df.iloc[index_map]["File"].tolist()
 
-    return df_final, pairwise_df, who_df, graph_html
+    return EvaluationFeatures(
+        df.drop(columns=["Theory_Text"]), flag_best, report_names, sim_matrix,
+        archive_best, archive_rows, metrics.to_dict() if metrics is not None else None
+    )
@@ -1,25 +1,15 @@
 import os
-import pdfplumber
-from PIL import Image
 import imagehash
-from io import BytesIO
 import numpy as np
+import pandas as pd
+from hash_index import HashIndex, hash_to_int
+from parallel import run_isolated
+from pdf_document import decode_thumbnail, load_document
 
-def extract_images(pdf_path):
-    images = []
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                for img in page.images:
-                    try:
-                        image_data = page.extract_image(img)["image"]
-                        img_obj = Image.open(BytesIO(image_data)).convert("RGB")
-                        images.append(img_obj)
-                    except:
-                        pass
-    except:
-        pass
-    return images
+def extract_images(pdf_path, doc=None):
+    if doc is None:
+        doc = load_document(pdf_path)
+    return list(doc.decoded_images())
 
 
 def is_blank(img):
@@ -29,38 +19,148 @@ def is_blank(img):
     return False
 
 
-def analyze_screenshots(pdf_files):
-    all_hashes = {}
-    report = {}
+def hash_images(imgs):
+    if not imgs:
+        return {"status": "NONE", "hashes": []}
 
-    for pdf in pdf_files:
-        imgs = extract_images(pdf)
-        if not imgs:
-            report[pdf] = {"status": "NONE", "hashes": []}
-            continue
+    hashes = []
+    blank_count = 0
+    for im in imgs:
+        if is_blank(im):
+            blank_count += 1
+        h = str(imagehash.phash(im))
+        hashes.append(h)
 
-        hashes = []
-        blank_count = 0
-        for im in imgs:
-            if is_blank(im):
-                blank_count += 1
-            h = str(imagehash.phash(im))
-            hashes.append(h)
+    if blank_count == len(imgs):
+        return {"status": "BLANK", "hashes": hashes}
+    return {"status": "OK", "hashes": hashes}
 
-        if blank_count == len(imgs):
-            report[pdf] = {"status": "BLANK", "hashes": hashes}
-        else:
-            report[pdf] = {"status": "OK", "hashes": hashes}
 
-        all_hashes[pdf] = hashes
+class ScreenshotHasher:
+    """
+    Streaming counterpart of extract_images + hash_images.
+
+    Pass add as load_document(on_image=...): every image is hashed from
+    a small grayscale thumbnail as soon as it is read, then dropped.
+    Bit-identical images (same raw bytes) are decoded only once.
+    """
+
+    def __init__(self):
+        self.hashes = []
+        self.blank_count = 0
+        self.seen = {}    # raw-bytes digest -> (phash, blank) or None
+
+    def add(self, record):
+        key = record["digest"]
+        if key not in self.seen:
+            try:
+                im = decode_thumbnail(record)
+                self.seen[key] = (str(imagehash.phash(im)), is_blank(im))
+            except:
+                self.seen[key] = None
+
+        hashed = self.seen[key]
+        if hashed is None:
+            return    # undecodable, skipped like extract_images does
+        self.hashes.append(hashed[0])
+        self.blank_count += hashed[1]
+
+    def result(self):
+        if not self.hashes:
+            return {"status": "NONE", "hashes": []}
+        if self.blank_count == len(self.hashes):
+            return {"status": "BLANK", "hashes": self.hashes}
+        return {"status": "OK", "hashes": self.hashes}
+
+
+def hash_document(doc):
+    """Streaming hash of an already-parsed PDFDocument's images."""
+    hasher = ScreenshotHasher()
+    for record in doc.images:
+        hasher.add(record)
+    return hasher.result()
+
+
+def hash_pdf(pdf_path):
+    hasher = ScreenshotHasher()
+    load_document(pdf_path, on_image=hasher.add)
+    return hasher.result()
+
+
+def find_duplicates(report, max_distance=0):
+    """
+    {pdf: set(other pdfs)} sharing at least one screenshot.
+
+    max_distance: phash Hamming distance still counted as the same
+    screenshot (0 = bit-exact; a few bits catch re-crops/re-encodes).
+    """
+    index = HashIndex(max_distance)
+    file_hashes = {}
+    for pdf, r in report.items():
+        if r["status"] == "NONE":
+            continue
+        file_hashes[pdf] = {hash_to_int(h) for h in r["hashes"]}
+        for h in file_hashes[pdf]:
+            index.add(h, pdf)
 
-    # detect duplicates
     duplicates = {}
-    for f1 in all_hashes:
-        for f2 in all_hashes:
-            if f1 != f2:
-                shared = set(all_hashes[f1]) & set(all_hashes[f2])
-                if shared:
-                    duplicates.setdefault(f1, set()).add(f2)
-
-    return report, duplicates
+    matches = {}
+    for pdf, hashes in file_hashes.items():
+        for h in hashes:
+            if h not in matches:
+                matches[h] = index.query(h)
+            others = matches[h] - {pdf}
+            if others:
+                duplicates.setdefault(pdf, set()).update(others)
+
+    return duplicates
+
+
+def screenshot_columns(files, report, duplicates):
+    """
+    (Screenshot_Status, Screenshot_Plagiarism) for a Series of file
+    names, joined on the file name: report/duplicates are keyed by
+    path, their basenames match files. Files missing from report are
+    "NONE"; files without duplicates get "".
+    """
+    status = pd.Series(
+        {os.path.basename(pdf): r.get("status", "NONE") for pdf, r in report.items()},
+        dtype=object
+    )
+    copied = pd.Series(
+        {
+            os.path.basename(pdf): ", ".join(sorted(os.path.basename(x) for x in others))
+            for pdf, others in duplicates.items()
+        },
+        dtype=object
+    )
+    return (
+        files.map(status).fillna("NONE").astype(str),
+        files.map(copied).fillna("").astype(str),
+    )
+
+
+def analyze_screenshots(pdf_files, documents=None, workers=1, max_distance=0):
+    """
+    documents: optional {pdf_path: PDFDocument} of already-parsed
+    files, so the PDFs are not opened a second time.
+    workers: process pool size for the files that still need parsing
+    (see parallel.resolve_workers).
+    max_distance: near-duplicate threshold (see find_duplicates).
+    """
+    documents = documents or {}
+    report = {}
+
+    to_parse = [pdf for pdf in pdf_files if pdf not in documents]
+    hashed = run_isolated(
+        hash_pdf, to_parse, workers, fallback=lambda pdf: hash_images([])
+    )
+    parsed = dict(zip(to_parse, hashed))
+
+    for pdf in pdf_files:
+        if pdf in parsed:
+            report[pdf] = parsed[pdf]
+        else:
+            report[pdf] = hash_document(documents[pdf])
+
+    return report, find_duplicates(report, max_distance)
@@ -1,14 +1,139 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+SECTION_COLUMNS = [
+    "Theory_Relevance",
+    "Algorithm_Relevance",
+    "Analysis_Relevance",
+    "Conclusion_Relevance"
+]
+
+# ============================================================
+#  LAZY MODEL SINGLETON
+# ============================================================
+# torch / sentence-transformers are only imported on first use,
+# so importing this module (and run_all, app) stays cheap.
+
+_model = None
+_model_lock = threading.Lock()
+_warm_thread = None
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+
+def warm_up():
+    """Loads the model on a background thread; returns the thread."""
+    global _warm_thread
+    if _warm_thread is None or not _warm_thread.is_alive():
+        _warm_thread = threading.Thread(
+            target=get_model, name="semantic-warm-up", daemon=True
+        )
+        _warm_thread.start()
+    return _warm_thread
+
+
+def is_loaded():
+    return _model is not None
+
+
+def __getattr__(name):
+    # Backward compatibility: semantic.model used to be eager
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ============================================================
+#  EMBEDDING CACHE (LRU, keyed by text hash)
+# ============================================================
+
+EMBED_CACHE_SIZE = 4096
+DEFAULT_BATCH_SIZE = 64
+
+_embed_cache = OrderedDict()
+_embed_lock = threading.Lock()
+
+
+def _text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embed(texts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Embeds texts as one (len(texts), dim) array.
+    Cached texts are reused; the rest (deduplicated) are encoded
+    in batches of batch_size.
+    """
+    keys = [_text_key(t) for t in texts]
+
+    # The lock guards the LRU only; encoding runs outside it, so
+    # concurrent jobs share the cache without serialising on the model
+    vectors = {}
+    missing = {}
+    with _embed_lock:
+        for k, t in zip(keys, texts):
+            if k in _embed_cache:
+                vectors[k] = _embed_cache[k]
+            elif k not in missing:
+                missing[k] = t
+
+    if missing:
+        encoded = get_model().encode(
+            list(missing.values()), batch_size=batch_size, convert_to_numpy=True
+        )
+        vectors.update(zip(missing, encoded))
+
+    with _embed_lock:
+        for k in keys:
+            _embed_cache[k] = vectors[k]
+            _embed_cache.move_to_end(k)
+        while len(_embed_cache) > EMBED_CACHE_SIZE:
+            _embed_cache.popitem(last=False)
+
+    out = [vectors[k] for k in keys]
+
+    if not out:
+        return np.zeros((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.vstack(out)
+
+
+# ============================================================
+#  RELEVANCE
+# ============================================================
 
 def similarity(a, b):
+    from sklearn.metrics.pairwise import cosine_similarity
+
     if not a.strip():
         return 0.0
-    emb = model.encode([a, b])
+    emb = embed([a, b])
     return cosine_similarity([emb[0]], [emb[1]])[0][0]
 
+
+def relevance_scores(topic, texts, batch_size=DEFAULT_BATCH_SIZE):
+    """Cosine similarity of every text against the topic, as one vector."""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    if not topic.strip() or not len(texts):
+        return np.zeros(len(texts), dtype=np.float32)
+
+    topic_vec = embed([topic], batch_size)
+    text_vecs = embed(list(texts), batch_size)
+    return cosine_similarity(text_vecs, topic_vec)[:, 0]
+
+
 def evaluate_sections(topic, theory, algorithm, analysis, conclusion):
     return {
         "Theory_Relevance": similarity(topic, theory),
@@ -16,3 +141,25 @@ def evaluate_sections(topic, theory, algorithm, analysis, conclusion):
         "Analysis_Relevance": similarity(topic, analysis),
         "Conclusion_Relevance": similarity(topic, conclusion)
     }
+
+
+def evaluate_sections_batch(topic, sections, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Batch form of evaluate_sections.
+
+    sections: {column: [text per student]} (see SECTION_COLUMNS)
+    Returns {column: np.ndarray of scores}. The topic is embedded once
+    and every section text of every student goes through embed(),
+    so repeated texts are only encoded once.
+    """
+    columns = list(sections)
+    all_texts = [t for c in columns for t in sections[c]]
+    scores = relevance_scores(topic, all_texts, batch_size)
+
+    out = {}
+    offset = 0
+    for c in columns:
+        n = len(sections[c])
+        out[c] = scores[offset:offset + n]
+        offset += n
+    return out
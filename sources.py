@@ -0,0 +1,201 @@
+import hashlib
+import os
+import tarfile
+import zipfile
+import zlib
+from contextlib import nullcontext
+
+CHUNK_SIZE = 1 << 20
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# A member that cannot be read is evaluated like an unreadable PDF
+READ_ERRORS = (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, zlib.error)
+
+
+# ============================================================
+#  PDFS HELD IN MEMORY
+# ============================================================
+
+class Member:
+    """
+    One submission PDF read into memory (an archive member or a
+    stream). name: its file name, the key the pipeline uses where a
+    folder run uses the path; data: its bytes; sha256: their digest,
+    computed during the same read. Sent as is to extraction workers.
+    """
+
+    __slots__ = ("name", "data", "sha256")
+
+    def __init__(self, name, data, sha256):
+        self.name = name
+        self.data = data
+        self.sha256 = sha256
+
+
+def pdf_name(pdf):
+    """Key of a PDF given as a path or a Member."""
+    return pdf.name if isinstance(pdf, Member) else pdf
+
+
+def pdf_sha256(pdf):
+    from result_cache import file_sha256
+
+    return pdf.sha256 if isinstance(pdf, Member) else file_sha256(pdf)
+
+
+def pdf_size(pdf):
+    return len(pdf.data) if isinstance(pdf, Member) else os.path.getsize(pdf)
+
+
+def read_member(name, stream, size=None):
+    """
+    Member from a binary stream, read chunk by chunk into a single
+    buffer (allocated up front when size is known) and hashed on the
+    way, so the bytes are touched once.
+    """
+    h = hashlib.sha256()
+    if size is None:
+        chunks = []
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+            chunks.append(chunk)
+        return Member(name, b"".join(chunks), h.hexdigest())
+
+    data = bytearray(size)
+    pos = 0
+    with memoryview(data) as view:
+        while pos < size:
+            n = stream.readinto(view[pos:pos + CHUNK_SIZE])
+            if not n:
+                break
+            h.update(view[pos:pos + n])
+            pos += n
+    del data[pos:]    # shorter than announced
+    return Member(name, data, h.hexdigest())
+
+
+def _read_or_empty(name, open_stream, size=None):
+    try:
+        with open_stream() as stream:
+            return read_member(name, stream, size)
+    except READ_ERRORS:
+        return Member(name, b"", hashlib.sha256(b"").hexdigest())
+
+
+# ============================================================
+#  ARCHIVES AND STREAMS
+# ============================================================
+
+def is_archive(path):
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _base(name):
+    # Archives written on Windows may use backslashes
+    return os.path.basename(name.replace("\\", "/"))
+
+
+def _is_pdf(name):
+    base = _base(name)
+    return base.lower().endswith(".pdf") and not base.startswith("._")    # macOS resource forks
+
+
+def _is_zip(source):
+    if hasattr(source, "read"):
+        if not source.seekable():
+            return False    # only tar can be read as a stream
+        pos = source.tell()
+        try:
+            return zipfile.is_zipfile(source)
+        finally:
+            source.seek(pos)
+    return zipfile.is_zipfile(source)
+
+
+class MemberReader:
+    """
+    The PDFs of a ZIP or tar archive (path or binary file object; tar
+    may be compressed and is read as a stream, so pipes work), or of
+    (name, data) pairs where data is bytes or a binary file object.
+
+    Iterating (once) reads one member at a time as a Member; folders
+    inside the archive are ignored and the first member of a file
+    name wins. names / sha256s: the members read so far, in order.
+    total: number of PDFs when known up front (ZIP), else None.
+    """
+
+    def __init__(self, source):
+        self.names = []
+        self.sha256s = []
+        self.total = None
+
+        if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+            if _is_zip(source):
+                archive = zipfile.ZipFile(source)
+                infos = [i for i in archive.infolist() if not i.is_dir() and _is_pdf(i.filename)]
+                self.total = len({_base(i.filename) for i in infos})
+                self._members = self._zip(archive, infos)
+            elif hasattr(source, "read") or tarfile.is_tarfile(source):
+                self._members = self._tar(source)
+            else:
+                raise ValueError(f"{source}: not a folder, ZIP or tar archive")
+        else:
+            self._members = self._pairs(source)
+
+    def __iter__(self):
+        seen = set()
+        for member in self._members:
+            if member.name in seen:
+                continue
+            seen.add(member.name)
+            self.names.append(member.name)
+            self.sha256s.append(member.sha256)
+            yield member
+
+    @staticmethod
+    def _zip(archive, infos):
+        with archive:
+            for info in infos:
+                yield _read_or_empty(
+                    _base(info.filename), lambda: archive.open(info), info.file_size
+                )
+
+    @staticmethod
+    def _tar(source):
+        if hasattr(source, "read"):
+            archive = tarfile.open(fileobj=source, mode="r|*")
+        else:
+            archive = tarfile.open(source, mode="r|*")
+        with archive:
+            for info in archive:
+                if info.isfile() and _is_pdf(info.name):
+                    yield _read_or_empty(
+                        _base(info.name), lambda: archive.extractfile(info), info.size
+                    )
+
+    @staticmethod
+    def _pairs(pairs):
+        for name, data in pairs:
+            if not _is_pdf(name):
+                continue
+            name = _base(name)
+            if hasattr(data, "read"):
+                yield _read_or_empty(name, lambda: nullcontext(data))    # the caller's stream stays open
+            else:
+                data = bytes(data) if isinstance(data, memoryview) else data
+                yield Member(name, data, hashlib.sha256(data).hexdigest())
+
+
+def submission_pdfs(source):
+    """
+    Sorted PDF paths of a folder (the workers read them from disk),
+    otherwise a MemberReader over source.
+    """
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        return [
+            os.path.join(source, f)
+            for f in sorted(os.listdir(source))
+            if f.lower().endswith(".pdf")
+        ]
+    return MemberReader(source)
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import shutil
+
+# ============================================================
+#  CONTENT-HASHED UPLOAD FOLDERS
+# ============================================================
+
+UPLOAD_ROOT = "uploads"
+
+
+def batch_digest(files):
+    """Stable id of a [(name, sha256)] batch, independent of upload order."""
+    payload = json.dumps(sorted(files)).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def hash_uploads(uploaded):
+    """
+    ({name: bytes}, sorted [(name, sha256)]) for (name, bytes) pairs;
+    the last upload of a name wins.
+    """
+    contents = {}
+    for name, data in uploaded:
+        contents[os.path.basename(name)] = data
+
+    files = sorted(
+        (name, hashlib.sha256(data).hexdigest()) for name, data in contents.items()
+    )
+    return contents, files
+
+
+def save_uploads(uploaded, session_id, root=UPLOAD_ROOT):
+    """
+    Writes uploaded (name, bytes) pairs to
+    root/<session_id>/<batch digest>/ and returns (folder, files),
+    files being sorted [(name, sha256)].
+
+    The same batch maps to the same folder, so re-clicks write
+    nothing. Older batches of the session are removed; other
+    sessions are never touched.
+    """
+    contents, files = hash_uploads(uploaded)
+    session_dir = os.path.join(root, session_id)
+    batch = batch_digest(files)[:16]
+    folder = os.path.join(session_dir, batch)
+
+    if not os.path.isdir(folder):
+        # Written aside and renamed, so a half-written batch never looks complete
+        tmp = folder + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, data in contents.items():
+            with open(os.path.join(tmp, name), "wb") as out:
+                out.write(data)
+        os.replace(tmp, folder)
+
+    for other in os.listdir(session_dir):
+        if other != batch:
+            shutil.rmtree(os.path.join(session_dir, other), ignore_errors=True)
+
+    return folder, files